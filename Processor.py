@@ -1,7 +1,6 @@
+import io
 import os
-from DataSynthesizer.DataDescriber import DataDescriber
-from synthetic_evaluation import sdv_metadata_manual_processing
-import pandas as pd
+from data_io import read_table, table_format
 
 class SDVProcessor:
     """ Processes the training data used for synthetic data generation into an appropriate
@@ -10,26 +9,22 @@ class SDVProcessor:
     Attributes
         params_dict (Dictionary): 
             categorical_attributes (List): List of categorical column names
-            epochs : Number of epochs to run the model training on (min. >= 500)
+            epochs : Number of epochs to run the model training on
         data_path (Path): Path of training data
+
+    param_dict is validated by SynPiper against the synthesizer's parameter schema (see registry.py).
     """
     
     def __init__(self, data_path, param_dict):
-        params_required = ["categorical_attributes", 
-                           "epochs"]
         self.data_path = data_path
-
-        # Check for inappropriate parameters
-        for param in param_dict.keys():
-            if param not in params_required:
-                raise ValueError("Unspecified Parameter")
-
         self.param_dict = param_dict
 
     def process(self):
         """ Processes the training data into an appropriate format for CTGAN / TVAE.
         """
-        real_data = pd.read_csv(self.data_path)
+        from synthetic_evaluation import sdv_metadata_manual_processing
+
+        real_data = read_table(self.data_path)
         
         # Generates sdv metadata
         metadata = sdv_metadata_manual_processing(real_data, self.param_dict['categorical_attributes'])
@@ -46,29 +41,29 @@ class DataSynthesizerProcessor:
             0 to turn off differential privacy.
         3) degree_of_bayesian_network: (integer) Higher degree means a more complex Bayesian Network model which could lead to overfitting.
             Recommended value: 3
+
+    param_dict is validated by SynPiper against the synthesizer's parameter schema (see registry.py).
     """
     
     # Set description file directory
     description_file = os.path.join(os.getcwd(), "description.json")
 
-    def __init__(self, data_path, param_dict):
-        params_required = [
-            "categorical_attributes",
-            "epsilon",
-            "degree_of_bayesian_network",
-        ]
-
-        # Check for inappropriate parameters
-        for param in param_dict.keys():
-            if param not in params_required:
-                raise ValueError(
-                    "Unspecified Parameter, Please follow the correct naming convention"
-                )
+    # Number of processes learning the Bayesian network, None for one per CPU
+    n_workers = None
 
+    def __init__(self, data_path, param_dict):
         self.data_path = data_path
         self.param_dict = param_dict
 
-    def process(self):
+    def process(self, seed=0):
+        """ Describes the training data and saves the description file.
+
+        Args:
+            seed (Integer): Seed of the Bayesian network and the differentially private noise
+        """
+        from DataSynthesizer.DataDescriber import DataDescriber
+        from bayesian_network import describe_dataset_in_correlated_attribute_mode
+
         describer = DataDescriber()
         cat_cols = self.param_dict["categorical_attributes"]
         cat_dict = {}
@@ -76,11 +71,22 @@ class DataSynthesizerProcessor:
         for cat in cat_cols:
             cat_dict[cat] = True
 
-        describer.describe_dataset_in_correlated_attribute_mode(
-            dataset_file = self.data_path,
+        # DataDescriber reads its input with pd.read_csv, which handles (compressed) csv paths.
+        # Columnar inputs are handed over as an in-memory csv buffer instead.
+        dataset_file = self.data_path
+        if table_format(self.data_path) != "csv":
+            dataset_file = io.StringIO(read_table(self.data_path).to_csv(index=False))
+
+        # Same description as describer.describe_dataset_in_correlated_attribute_mode,
+        # with the Bayesian network learnt in parallel
+        describe_dataset_in_correlated_attribute_mode(
+            describer,
+            dataset_file=dataset_file,
             epsilon=self.param_dict["epsilon"],
             k=self.param_dict["degree_of_bayesian_network"],
             attribute_to_is_categorical=cat_dict,
+            seed=seed,
+            n_workers=self.n_workers,
         )
 
         print("Saving Dataset Description File")
@@ -1,7 +1,8 @@
-from Processor import SDVProcessor, DataSynthesizerProcessor
-from DataSynthesizer.DataGenerator import DataGenerator
+from registry import get_synthesizer
+from data_io import temporary_path, write_table
+from sample_cache import SampleCache, block_seed, sample_blocks
+from utils import pin_seeds
 import os
-from sdv.single_table import CTGANSynthesizer, TVAESynthesizer
 import pandas as pd
 import time
 
@@ -9,52 +10,71 @@ class SynPiper:
     """
     Uninitialised Attributes:
         processor: Allocated input data processor based on chosen synthesizer
+        processed: Output of the processor (sdv metadata or DataSynthesizer description file)
+        model: Trained model returned by the synthesizer's fit hook
         generated_samples: synthetic data (pandas Dataframe format)
     
     Initialised Attributes:
-        synthesizer_name: Name of Synthesizer
-        data_path: File Path of where the Real Data csv is found
-        synthetic_filepath: File Path where Synthetic Data csv will be stored
+        synthesizer_name: Name of Synthesizer (see registry.SYNTHESIZERS)
+        data_path: File Path of where the Real Data is found (csv, compressed csv, Parquet or Feather)
+        synthetic_filepath: File Path where Synthetic Data will be stored, in the format of its extension
         param_dict: Dictionary of parameters required for synthesizer
+        seed: Seed for training and sampling, None for unseeded runs
+        cache: SampleCache of models and samples, None if caching is disabled
+        checkpoint_path: File where training checkpoints of this run are written, None if disabled
+        checkpoint_every: Number of epochs between training checkpoints
     """
 
     # Initialise appropriate Pre-Processors, check for correct param_dict.
-    def __init__(self, data_path, synthesizer_name, param_dict, synthetic_filepath):
+    def __init__(self, data_path, synthesizer_name, param_dict, synthetic_filepath,
+                 seed=None, cache_dir=None, cache_max_bytes=1 << 30, checkpoint_dir=None, checkpoint_every=50):
         """ Initialiser for Synthesizer
         Args:
             synthesizer_name: Name of Synthesizer
-            data_path: File Path of where the Real Data csv is found
-            synthetic_filepath: File Path where Synthetic Data csv will be stored
+            data_path: File Path of where the Real Data is found
+            synthetic_filepath: File Path where Synthetic Data will be stored
             param_dict: Dictionary of parameters required for synthesizer
+            seed: Seed for training and sampling. Runs with the same data, parameters,
+                number of rows and seed produce the same synthetic data.
+            cache_dir: Directory of the sample cache. Only seeded runs are cached.
+            cache_max_bytes: Size of the sample cache above which old entries are evicted
+            checkpoint_dir: Directory where training checkpoints are written, for synthesizers
+                that support resuming (CTGAN and TVAE). A run that finds its checkpoint there
+                continues training from it.
+            checkpoint_every: Number of epochs between training checkpoints
         """
 
-        # SDV Pre-Processor
-        if synthesizer_name == "ctgan" or synthesizer_name == "tvae":
-            print("Initialising SDV Processor")
-            self.processor = SDVProcessor(data_path, param_dict)
-            print("Processor initialised!")
+        # Raises ValueError for an unspecified Synthesizer Name, or parameters not matching its schema
+        self.spec = get_synthesizer(synthesizer_name)
+        self.spec.validate_params(param_dict)
 
-        # DataSynthesizer Pre-processor
-        elif synthesizer_name == "dpsynthesizer":
-            print("Initialising DataSynthesizer Processor")
-            self.processor = DataSynthesizerProcessor(data_path, param_dict)
-            print("Processor initialised!")
-
-        # Unspecified Synthesizer Name Error
-        else:
-            raise ValueError("Unspecified Synthesizer Name inputted.")
+        print(f"Initialising {self.spec.label} Processor")
+        self.processor = self.spec.load_processor()(data_path, param_dict)
+        print("Processor initialised!")
 
         self.synthesizer_name = synthesizer_name
         self.data_path = data_path
         self.synthetic_filepath = synthetic_filepath
         self.param_dict = param_dict
-
-    def generate(self, num_tuples_to_generate):
-        """ General generate function which calls the appropriate generating function
-        based on the name of synthesizer initialised.
+        self.seed = seed
+        self.cache = SampleCache(cache_dir, cache_max_bytes) if cache_dir is not None and seed is not None else None
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = None
+        if checkpoint_dir is not None and self.spec.resume is not None:
+            os.makedirs(checkpoint_dir, exist_ok=True)
+            # Checkpoints are keyed like cached models, so a run only resumes its own training
+            model_key = SampleCache.model_key(synthesizer_name, param_dict, data_path, seed)
+            self.checkpoint_path = os.path.join(checkpoint_dir, f"checkpoint-{model_key}")
+        self.processed = None
+        self.model = None
+
+    def generate(self, num_tuples_to_generate, conditions=None):
+        """ General generate function which trains the synthesizer initialised,
+        samples from it and saves the synthetic data.
 
         Args:
             num_tuples_to_generate: Number of samples to generate
+            conditions: Dictionary of column name to the value every sample should have (optional)
 
         Returns:
             None
@@ -63,67 +83,136 @@ class SynPiper:
         timer = Timer()
         timer.start()
 
-        if self.synthesizer_name == "ctgan" or self.synthesizer_name == "tvae":
-            self.generate_sdv(num_tuples_to_generate=num_tuples_to_generate)
-
-        elif self.synthesizer_name == "dpsynthesizer":
-            self.generate_dpsynthesizer(num_tuples_to_generate=num_tuples_to_generate)
-
+        if self.cache is not None:
+            synthetic_data = self.generate_cached(num_tuples_to_generate, conditions)
+        elif self.seed is not None:
+            self.fit()
+            synthetic_data = self.sample_seeded(num_tuples_to_generate, conditions)
         else:
-            raise ValueError("Unknown Synthesizer Name found.")
+            self.fit()
+            synthetic_data = self.sample(num_tuples_to_generate, conditions)
+
+        self.save(synthetic_data)
         
         self.elapsed_time = timer.stop()
-    
-    # CTGAN and TVAE (belonging to Synthetic Data Vault (sdv) library)
-    def generate_sdv(self, num_tuples_to_generate):
-        print("Processing input data...")
-        metadata = self.processor.process()
-        real_data = pd.read_csv(self.data_path)
-        
-        if self.synthesizer_name == "ctgan": 
-            synthesizer = CTGANSynthesizer(metadata,
-                                        verbose = True,
-                                        epochs = self.param_dict["epochs"])
-
-        elif self.synthesizer_name == "tvae":
-            synthesizer = TVAESynthesizer(metadata,
-                                        epochs = self.param_dict["epochs"])
-        
-        print("Starting Generator Training")
-        synthesizer.fit(real_data)
-        
-        print(f"Generator Training Completed, Generating {num_tuples_to_generate} of data")
-        synthetic_data = synthesizer.sample(num_tuples_to_generate)
-        
-        # Saves the Synthetic Data csv file to the designated filepath
-        synthetic_data.to_csv(index = 0, path_or_buf= self.synthetic_filepath)
-        print("Successfully saved the synthetic dataset to", self.synthetic_filepath)
 
-        # Store the synthetic samples as an attribute
-        self.generated_samples = synthetic_data
+    def generate_cached(self, num_tuples_to_generate, conditions=None):
+        """ Returns the first num_tuples_to_generate samples of this model, seed and conditions.
+        Samples are generated in seeded blocks. Blocks already in the cache are reused, and only
+        the missing blocks are sampled, from the cached model if there is one.
+        """
+        model_key = SampleCache.model_key(self.synthesizer_name, self.param_dict, self.data_path, self.seed)
+        sample_key = SampleCache.sample_key(model_key, self.seed, conditions)
+
+        cached = self.cache.load_samples(sample_key)
+        n_cached = 0 if cached is None else len(cached)
+        if n_cached >= num_tuples_to_generate:
+            print(f"Loaded {num_tuples_to_generate} rows of Synthetic Data from the cache.")
+            return cached.head(num_tuples_to_generate)
+
+        self.fit_cached(model_key)
+
+        new_blocks = self.sample_seeded(num_tuples_to_generate, conditions, start_row=n_cached, whole_blocks=True)
+        synthetic_data = pd.concat([cached, new_blocks], ignore_index=True) if cached is not None else new_blocks
+        self.cache.store_samples(sample_key, synthetic_data)
+        return synthetic_data.head(num_tuples_to_generate)
+
+    def fit_cached(self, model_key):
+        """ Loads the trained model from the cache, or trains and caches it """
+        if self.model is not None:
+            return
+
+        model_path = self.cache.model_path(model_key)
+        if self.spec.load_model is not None and os.path.exists(model_path):
+            print("Loaded the trained model from the cache.")
+            self.cache.touch(model_path)
+            self.model = self.spec.load_model(model_path)
+            return
+
+        self.fit()
+        if self.spec.save_model is not None:
+            self.cache.store_model(model_key, self.spec.save_model, self.model)
+
+    # Kept for scripts written against the library-specific generate functions
+    generate_sdv = generate
+    generate_dpsynthesizer = generate
+
+    def process(self):
+        """ Processes the input data for the synthesizer (stored as .processed).
+        fit reuses the result, so processing beforehand (e.g. to time it on its own) is not repeated.
+        """
+        if self.processed is None:
+            print("Processing input data...")
+            if self.spec.process is not None:
+                self.processed = self.spec.process(self)
+            else:
+                self.processed = self.processor.process()
+        return self.processed
+
+    def fit(self):
+        """ Processes the input data and trains the synthesizer (stored as .model).
+        Continues from the last checkpoint of this run if there is one.
+        """
+        if self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            self.resume()
+            return
+
+        if self.seed is not None:
+            pin_seeds(self.seed)
+        self.model = self.spec.fit(self)
+
+    def resume(self):
+        """ Continues training from the last checkpoint of this run (stored as .model) """
+        if self.spec.resume is None:
+            raise ValueError(f"Resuming training is not supported by the {self.spec.label}.")
+        if self.checkpoint_path is None:
+            raise ValueError("Checkpoints are not enabled, please specify a checkpoint_dir.")
+        if not os.path.exists(self.checkpoint_path):
+            raise ValueError("No checkpoint to resume training from.")
+
+        print("Resuming training from", self.checkpoint_path)
+        self.model = self.spec.resume(self)
+
+    def sample(self, num_tuples_to_generate, conditions=None, seed=None):
+        """ Samples synthetic data from the trained model, seeding the synthesizer's
+        random number generator with seed if given
+        """
+        return self.spec.sample(self, self.model, num_tuples_to_generate, conditions, seed)
 
-    # DataSynthesizer's Library
-    def generate_dpsynthesizer(self, num_tuples_to_generate):
-        
-        print("Processing input data...")
-        # Processing input data
-        description_file = self.processor.process()
-        print("DP Synthesizer Processing Complete")
-
-        # Generating Synthetic Data
-        generator = DataGenerator()
-        print(f"Generating {num_tuples_to_generate} rows of Synthetic Data.")
-        generator.generate_dataset_in_correlated_attribute_mode(
-            num_tuples_to_generate, description_file
-        )
-        
-        # Saves the generated synthetic data (csv) to synthetic filepath
-        generator.save_synthetic_data(self.synthetic_filepath)
+    def sample_seeded(self, num_tuples_to_generate, conditions=None, start_row=0, whole_blocks=False):
+        """ Samples rows start_row to num_tuples_to_generate in seeded blocks, so the result
+        does not depend on how the rows are requested. start_row must be a block boundary.
+
+        Args:
+            num_tuples_to_generate: Number of samples to generate
+            conditions: Dictionary of column name to the value every sample should have (optional)
+            start_row: Number of leading rows that are already available
+            whole_blocks: Whether to return the last block in full rather than cut at num_tuples_to_generate
+        """
+        blocks = []
+        for block, (start, stop) in enumerate(sample_blocks(num_tuples_to_generate)):
+            if stop > start_row:
+                seed = block_seed(self.seed, block)
+                pin_seeds(seed)
+                blocks.append(self.sample(stop - start, conditions, seed=seed))
+
+        synthetic_data = pd.concat(blocks, ignore_index=True)
+        if whole_blocks:
+            return synthetic_data
+        return synthetic_data.head(num_tuples_to_generate - start_row)
+
+    def save(self, synthetic_data):
+        """ Saves the synthetic data to the synthetic filepath and stores it as .generated_samples """
+        # Written next to the synthetic filepath and moved into place,
+        # so a partially written file is never served
+        tmp_path = temporary_path(self.synthetic_filepath)
+        write_table(synthetic_data, tmp_path)
+        os.replace(tmp_path, self.synthetic_filepath)
         print("Successfully saved the synthetic dataset to", self.synthetic_filepath)
         print("Access the synthetic samples by calling .generated_samples")
 
         # Store the synthetic samples as an attribute
-        self.generated_samples = pd.read_csv(self.synthetic_filepath)
+        self.generated_samples = synthetic_data
 
 
 class Timer:
@@ -0,0 +1,203 @@
+""" Parallel Bayesian network structure learning for the DP Synthesizer.
+
+A drop-in replacement for DataSynthesizer's greedy_bayes (PrivBayes). Candidates are
+enumerated in the same order and sampled with the same exponential mechanism, so for
+the same seed it learns the same network, but:
+    - mutual information is computed from the pre-encoded integer arrays with bincount,
+      rather than from string-joined parent columns
+    - the joint encoding of each candidate parent set is computed once per iteration and
+      shared by every child it is scored against
+    - scores are cached across greedy iterations, so each iteration only scores the parent
+      sets that include the newly added attribute
+    - parent sets are scored in a process pool that lives for the whole search
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import math
+import os
+import random
+import numpy as np
+
+# Encoded dataset and cardinalities of the current search, shared with the worker processes
+_ENCODED = None
+_CARDINALITIES = None
+
+def _init_worker(encoded, cardinalities):
+    global _ENCODED, _CARDINALITIES
+    _ENCODED = encoded
+    _CARDINALITIES = cardinalities
+
+def _joint_codes(columns):
+    """ Dense integer code of every row's combination of values in the given columns """
+    code = _ENCODED[:, columns[0]]
+    for col in columns[1:]:
+        # Re-densify before the mixed-radix code can overflow
+        if int(code.max()) + 1 > np.iinfo(np.int64).max // int(_CARDINALITIES[col]):
+            code = np.unique(code, return_inverse=True)[1].reshape(-1)
+        code = code * _CARDINALITIES[col] + _ENCODED[:, col]
+    uniques, inverse = np.unique(code, return_inverse=True)
+    return inverse.reshape(-1), len(uniques)
+
+def _mutual_information(x, n_x, y, n_y):
+    """ Mutual information (natural log) of two integer label arrays,
+    equal to sklearn's mutual_info_score
+    """
+    n = len(x)
+    if n_x * n_y <= max(1 << 22, 4 * n):
+        contingency = np.bincount(x * n_y + y, minlength=n_x * n_y).reshape(n_x, n_y)
+        p_x = contingency.sum(axis=1) / n
+        p_y = contingency.sum(axis=0) / n
+        rows, cols = np.nonzero(contingency)
+        p_xy = contingency[rows, cols] / n
+    else:
+        keys, counts = np.unique(x * n_y + y, return_counts=True)
+        rows, cols = keys // n_y, keys % n_y
+        p_x = np.bincount(x, minlength=n_x) / n
+        p_y = np.bincount(y, minlength=n_y) / n
+        p_xy = counts / n
+
+    mi = np.sum(p_xy * np.log(p_xy / (p_x[rows] * p_y[cols])))
+    return max(float(mi), 0.0)
+
+def _score_parent_set(task):
+    """ Mutual information of one parent set with each of the given children """
+    parents, children = task
+    y, n_y = _joint_codes(list(parents))
+    return [
+        _mutual_information(_ENCODED[:, child], int(_CARDINALITIES[child]), y, n_y)
+        for child in children
+    ]
+
+def greedy_bayes_parallel(dataset, k, epsilon, seed=0, n_workers=None):
+    """ Construct a Bayesian Network (BN) using the PrivBayes greedy algorithm.
+    Same inputs and output as DataSynthesizer.lib.PrivBayes.greedy_bayes.
+
+    Args:
+        dataset (Dataframe): Input dataset encoded into integer bin indices
+        k (Integer): Maximum degree of the constructed BN. If k=0, k is automatically calculated.
+        epsilon (Float): Parameter of differential privacy, 0 for the most informative network
+        seed (Integer): Seed for the randomness in BN generation
+        n_workers (Integer): Number of worker processes (defaults to the number of CPUs),
+            1 to score in the current process
+
+    Returns:
+        bayesian_network (List): (child, [parents]) of every attribute except the root
+    """
+    from DataSynthesizer.lib.PrivBayes import calculate_k, exponential_mechanism
+    from DataSynthesizer.lib.utils import set_random_seed
+
+    set_random_seed(seed)
+    attributes = list(dataset.columns)
+    index = {attr: i for i, attr in enumerate(attributes)}
+    encoded = dataset.to_numpy(dtype=np.int64)
+    encoded = encoded - encoded.min(axis=0, initial=0)
+    cardinalities = encoded.max(axis=0, initial=0) + 1
+
+    num_tuples, num_attributes = encoded.shape
+    if not k:
+        k = calculate_k(num_attributes, num_tuples)
+
+    attr_to_is_binary = {attr: len(np.unique(encoded[:, index[attr]])) <= 2 for attr in attributes}
+
+    n_workers = n_workers or os.cpu_count() or 1
+    pool = None
+    if n_workers > 1:
+        pool = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                   initargs=(encoded, cardinalities))
+    else:
+        _init_worker(encoded, cardinalities)
+
+    print('================ Constructing Bayesian Network (BN) ================')
+    root_attribute = random.choice(attributes)
+    V = [root_attribute]
+    rest_attributes = list(attributes)
+    rest_attributes.remove(root_attribute)
+    print(f'Adding ROOT {root_attribute}')
+
+    mi_cache = {}
+    N = []
+    try:
+        while rest_attributes:
+            num_parents = min(len(V), k)
+
+            # Candidates in the order of DataSynthesizer's greedy_bayes, so that sampling
+            # with the same seed picks the same candidate
+            parents_pair_list = []
+            for child in rest_attributes:
+                for split in range(len(V) - num_parents + 1):
+                    for other_parents in combinations(V[split + 1:], num_parents - 1):
+                        parents_pair_list.append((child, list(other_parents) + [V[split]]))
+
+            # Parent sets that still need scoring, with the children to score them against
+            pending = {}
+            for child, parents in parents_pair_list:
+                if (child, tuple(parents)) not in mi_cache:
+                    pending.setdefault(tuple(parents), []).append(child)
+
+            tasks = [
+                (tuple(index[attr] for attr in parents), [index[child] for child in children])
+                for parents, children in pending.items()
+            ]
+            if pool is not None:
+                chunksize = max(1, math.ceil(len(tasks) / (4 * n_workers)))
+                results = pool.map(_score_parent_set, tasks, chunksize=chunksize)
+            else:
+                results = map(_score_parent_set, tasks)
+
+            for (parents, children), scores in zip(pending.items(), results):
+                for child, mi in zip(children, scores):
+                    mi_cache[(child, parents)] = mi
+
+            mutual_info_list = [mi_cache[(child, tuple(parents))] for child, parents in parents_pair_list]
+
+            if epsilon:
+                sampling_distribution = exponential_mechanism(epsilon, mutual_info_list, parents_pair_list,
+                                                              attr_to_is_binary, num_tuples, num_attributes)
+                idx = np.random.choice(list(range(len(mutual_info_list))), p=sampling_distribution)
+            else:
+                idx = mutual_info_list.index(max(mutual_info_list))
+
+            N.append(parents_pair_list[idx])
+            adding_attribute = parents_pair_list[idx][0]
+            V.append(adding_attribute)
+            rest_attributes.remove(adding_attribute)
+            print(f'Adding attribute {adding_attribute}')
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    print('========================== BN constructed ==========================')
+    return N
+
+def describe_dataset_in_correlated_attribute_mode(describer, dataset_file, k, epsilon,
+                                                  attribute_to_is_categorical=None, seed=0, n_workers=None):
+    """ DataDescriber.describe_dataset_in_correlated_attribute_mode, with the Bayesian network
+    learnt by greedy_bayes_parallel. The resulting description (describer.data_description)
+    is saved and consumed by DataGenerator exactly as DataSynthesizer's own.
+
+    Args:
+        describer (DataDescriber): Describer to fill in
+        dataset_file: File name or buffer of the input dataset in csv format
+        k (Integer): Maximum number of parents in Bayesian network
+        epsilon (Float): Privacy budget, 0 to turn off differential privacy
+        attribute_to_is_categorical (Dictionary): {attribute: boolean}
+        seed (Integer): Seed the random number generator
+        n_workers (Integer): Number of worker processes used to score parent sets
+    """
+    from DataSynthesizer.lib.PrivBayes import construct_noisy_conditional_distributions
+
+    describer.describe_dataset_in_independent_attribute_mode(
+        dataset_file,
+        epsilon=epsilon,
+        attribute_to_is_categorical=attribute_to_is_categorical,
+        seed=seed,
+    )
+    describer.df_encoded = describer.encode_dataset_into_binning_indices()
+    if describer.df_encoded.shape[1] < 2:
+        raise ValueError("Correlated Attribute Mode requires at least 2 attributes (i.e., columns) in dataset.")
+
+    describer.bayesian_network = greedy_bayes_parallel(describer.df_encoded, k, epsilon / 2,
+                                                       seed=seed, n_workers=n_workers)
+    describer.data_description['bayesian_network'] = describer.bayesian_network
+    describer.data_description['conditional_probabilities'] = construct_noisy_conditional_distributions(
+        describer.bayesian_network, describer.df_encoded, epsilon / 2)
@@ -0,0 +1,355 @@
+""" Performance regression benchmarks over the bundled datasets.
+
+Measures the cold-start import cost of the modules and Streamlit pages, then runs every
+pipeline stage (setup, processing, fit, sample, save and each evaluation metric) with pinned
+seeds and small epoch counts. The time and peak resident memory (RSS, which includes native
+allocations such as torch tensors) of each stage is recorded and compared against a stored
+baseline. Each pipeline runs in a fresh process, so its memory is not inflated by the
+pipelines before it.
+
+Tracing the Python heap with tracemalloc slows down the code it traces, so the peak
+Python-heap memory of each stage is only recorded on request, in a second pass that is not timed.
+
+    python benchmark.py                      # compare against benchmark_baseline.json
+    python benchmark.py --update-baseline    # record a new baseline
+    python benchmark.py --trace-python-heap  # also record and compare the peak Python heap
+
+Exits with status 1 if any stage regressed by more than the threshold, 2 if there is no baseline.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import ast
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import numpy as np
+import psutil
+import matplotlib.pyplot as plt
+from SynPiper import SynPiper
+from data_io import read_table, write_table
+from synthetic_evaluation import (
+    get_all_ks_scores,
+    get_all_variational_differences,
+    plot_corr_matrix,
+    plot_mi_matrix,
+)
+from utils import count_exact_match_rows, pin_seeds
+
+DATASETS = [
+    "adult_processed.csv",
+    "heartprocessed.csv",
+    "BankChurners.csv",
+    "employee_attrition.csv",
+]
+
+# Small, fixed parameters so that timings reflect the pipeline rather than model quality
+SYNTHESIZER_PARAMS = {
+    "ctgan": {"epochs": 10},
+    "tvae": {"epochs": 10},
+    "dpsynthesizer": {"epsilon": 1, "degree_of_bayesian_network": 2},
+}
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules and Streamlit pages whose cold-start import cost is measured
+IMPORT_TARGETS = [
+    "SynPiper",
+    "synthetic_evaluation",
+    "Main_Page.py",
+    os.path.join("pages", "Data Synthesizer.py"),
+    os.path.join("pages", "Evaluate.py"),
+]
+
+# Run in a fresh interpreter, so nothing is imported beforehand.
+# Importing only grows the process, so its RSS afterwards is the peak.
+# With a second argument of "1" only the peak Python heap is recorded, as tracing slows down the imports.
+IMPORT_PROBE = """
+import json, sys, time
+import psutil
+trace_python_heap = sys.argv[2] == "1"
+if trace_python_heap:
+    import tracemalloc
+    tracemalloc.start()
+start = time.perf_counter()
+exec(compile(sys.argv[1], "imports", "exec"), {"__name__": "__probe__"})
+elapsed = time.perf_counter() - start
+if trace_python_heap:
+    result = {"python_heap_peak_mb": tracemalloc.get_traced_memory()[1] / 2**20}
+else:
+    result = {"time": elapsed, "peak_rss_mb": psutil.Process().memory_info().rss / 2**20}
+print(json.dumps(result))
+"""
+
+# Memory metrics compared against the baseline
+MEMORY_METRICS = ["peak_rss_mb", "python_heap_peak_mb"]
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmark_baseline.json")
+
+def infer_categorical_columns(df, categorical_threshold=10):
+    """ Columns that are non-numeric or have few unique values,
+    matching the rule of sdv_metadata_auto_processing.
+    """
+    return [
+        col for col in df.columns
+        if len(df[col].unique()) <= categorical_threshold or not np.issubdtype(df[col].dtype, np.number)
+    ]
+
+def _print_result(name, result):
+    columns = []
+    if "time" in result:
+        columns.append(f"{result['time']:>9.3f}s")
+    if "peak_rss_mb" in result:
+        columns.append(f"{result['peak_rss_mb']:>10.1f}MB RSS")
+    if "python_heap_peak_mb" in result:
+        columns.append(f"{result['python_heap_peak_mb']:>10.1f}MB heap")
+    print(f"{name:<50} " + " ".join(columns))
+
+class StageRecorder:
+    """ Measures the wall time and peak RSS of named stages, or only their peak Python-heap memory.
+    The RSS is sampled by a background thread every sample_interval seconds. The Python heap
+    is traced with tracemalloc (which does not see native allocations, e.g. torch tensors),
+    which slows down the stage, so stages are either timed or traced.
+
+    Attributes:
+        results: Dictionary of stage name to {"time": seconds, "peak_rss_mb": megabytes}
+            or {"python_heap_peak_mb": megabytes} when tracing
+        sample_interval: Seconds between RSS samples
+        trace_python_heap: Whether to trace the Python heap instead of measuring time and RSS
+    """
+
+    def __init__(self, sample_interval=0.01, trace_python_heap=False):
+        self.results = {}
+        self.sample_interval = sample_interval
+        self.trace_python_heap = trace_python_heap
+
+    def record(self, name, result):
+        """ Adds the metrics of a stage, keeping those recorded by another pass """
+        self.results.setdefault(name, {}).update(result)
+        _print_result(name, result)
+
+    def merge(self, results):
+        """ Adds the results recorded by another StageRecorder (e.g. in a worker process) """
+        for name, result in results.items():
+            self.results.setdefault(name, {}).update(result)
+
+    def run(self, name, func, *args, **kwargs):
+        if self.trace_python_heap:
+            return self._run_traced(name, func, *args, **kwargs)
+
+        process = psutil.Process()
+        peak_rss = process.memory_info().rss
+        stop = threading.Event()
+
+        def sample_rss():
+            nonlocal peak_rss
+            while not stop.wait(self.sample_interval):
+                peak_rss = max(peak_rss, process.memory_info().rss)
+
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            output = func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stop.set()
+            sampler.join()
+            peak_rss = max(peak_rss, process.memory_info().rss)
+
+        self.record(name, {"time": elapsed, "peak_rss_mb": peak_rss / 2**20})
+        return output
+
+    def _run_traced(self, name, func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            output = func(*args, **kwargs)
+        finally:
+            _, heap_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.record(name, {"python_heap_peak_mb": heap_peak / 2**20})
+        return output
+
+def import_statements(target):
+    """ Import statements executed when a module or page is loaded.
+    For pages (.py files) these are the top-level imports of the script.
+    """
+    if not target.endswith(".py"):
+        return f"import {target}"
+
+    with open(os.path.join(ROOT, target)) as f:
+        tree = ast.parse(f.read())
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+def benchmark_imports(recorder, targets):
+    """ Records the cold-start import time and peak memory of each module or page """
+    for target in targets:
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE, import_statements(target), str(int(recorder.trace_python_heap))],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        recorder.record(f"import/{target}", json.loads(output.strip().splitlines()[-1]))
+
+def benchmark_pipeline(recorder, dataset_path, synthesizer_name, workdir, max_rows, seed):
+    """ Runs every stage of one synthesizer on one dataset """
+    dataset = os.path.splitext(os.path.basename(dataset_path))[0]
+    prefix = f"{dataset}/{synthesizer_name}"
+
+    real_data = read_table(dataset_path)
+    if max_rows is not None and len(real_data) > max_rows:
+        real_data = real_data.sample(n=max_rows, random_state=seed).reset_index(drop=True)
+
+    data_path = os.path.join(workdir, f"{dataset}.csv")
+    write_table(real_data, data_path)
+
+    categorical_columns = infer_categorical_columns(real_data)
+    numerical_columns = [col for col in real_data.columns if col not in categorical_columns]
+    param_dict = {"categorical_attributes": categorical_columns, **SYNTHESIZER_PARAMS[synthesizer_name]}
+
+    pin_seeds(seed)
+    piper = recorder.run(
+        f"{prefix}/setup",
+        SynPiper,
+        data_path=data_path,
+        synthesizer_name=synthesizer_name,
+        param_dict=param_dict,
+        synthetic_filepath=os.path.join(workdir, f"{dataset}_{synthesizer_name}_synthetic.csv"),
+    )
+
+    if hasattr(piper.processor, "description_file"):
+        piper.processor.description_file = os.path.join(workdir, f"{dataset}_description.json")
+
+    # fit reuses the processed data, so it only times the training
+    recorder.run(f"{prefix}/process", piper.process)
+    recorder.run(f"{prefix}/fit", piper.fit)
+    synthetic_data = recorder.run(f"{prefix}/sample", piper.sample, len(real_data))
+    recorder.run(f"{prefix}/save", piper.save, synthetic_data)
+
+    recorder.run(f"{prefix}/get_all_ks_scores", get_all_ks_scores,
+                 real_data, synthetic_data, numerical_columns)
+    recorder.run(f"{prefix}/get_all_variational_differences", get_all_variational_differences,
+                 real_data, synthetic_data, categorical_columns)
+
+    if numerical_columns:
+        fig = recorder.run(f"{prefix}/plot_corr_matrix", plot_corr_matrix,
+                           real_data[numerical_columns], synthetic_data[numerical_columns])
+        plt.close(fig)
+
+    fig, _, _ = recorder.run(f"{prefix}/plot_mi_matrix", plot_mi_matrix, real_data, synthetic_data)
+    plt.close(fig)
+
+    recorder.run(f"{prefix}/count_exact_match_rows", count_exact_match_rows, real_data, synthetic_data)
+
+def _run_pipeline(trace_python_heap, *args):
+    """ benchmark_pipeline in a worker process, returning the recorded results """
+    recorder = StageRecorder(trace_python_heap=trace_python_heap)
+    benchmark_pipeline(recorder, *args)
+    return recorder.results
+
+def compare_to_baseline(results, baseline, threshold, min_time):
+    """ Lists the stages whose time or peak memory (each of MEMORY_METRICS recorded in both
+    the results and the baseline) exceeds the baseline by more than threshold.
+    Stages faster than min_time in the baseline are not compared on time, as they are dominated by noise.
+
+    Returns:
+        regressions (List): Human-readable description of each regression
+    """
+    regressions = []
+    for stage, current in results.items():
+        if stage not in baseline:
+            continue
+
+        previous = baseline[stage]
+        if previous["time"] >= min_time and current["time"] > previous["time"] * (1 + threshold):
+            regressions.append(f"{stage}: time {previous['time']:.3f}s -> {current['time']:.3f}s")
+
+        for metric in MEMORY_METRICS:
+            if metric in previous and metric in current and current[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{stage}: {metric} {previous[metric]:.1f}MB -> {current[metric]:.1f}MB")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="SynPiper performance regression benchmarks")
+    parser.add_argument("--datasets", nargs="+", default=DATASETS)
+    parser.add_argument("--synthesizers", nargs="+", default=list(SYNTHESIZER_PARAMS))
+    parser.add_argument("--max-rows", type=int, default=2000,
+                        help="Rows sampled from each dataset (with the seed), 0 for all rows")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed relative increase in time or peak memory")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Stages faster than this (seconds) are not compared on time")
+    parser.add_argument("--skip-imports", action="store_true",
+                        help="Do not measure the cold-start import time of modules and pages")
+    parser.add_argument("--trace-python-heap", action="store_true",
+                        help="Record the peak Python-heap memory of every stage in a second, untimed pass")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Without a baseline there is nothing to compare against, rather than silently recording one
+    if not args.update_baseline and not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, record one with --update-baseline")
+        return 2
+
+    datasets_dir = os.path.join(ROOT, "datasets")
+    recorder = StageRecorder()
+
+    # Each pipeline runs in a fresh process, so its peak RSS only reflects its own stages
+    context = multiprocessing.get_context("spawn")
+    passes = [False, True] if args.trace_python_heap else [False]
+    with tempfile.TemporaryDirectory() as workdir:
+        for trace_python_heap in passes:
+            pass_recorder = StageRecorder(trace_python_heap=trace_python_heap)
+            if not args.skip_imports:
+                benchmark_imports(pass_recorder, IMPORT_TARGETS)
+
+            for dataset in args.datasets:
+                for synthesizer_name in args.synthesizers:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        pass_recorder.merge(pool.submit(
+                            _run_pipeline,
+                            trace_python_heap,
+                            os.path.join(datasets_dir, dataset),
+                            synthesizer_name,
+                            workdir,
+                            args.max_rows or None,
+                            args.seed,
+                        ).result())
+
+            recorder.merge(pass_recorder.results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(recorder.results, f, indent=4)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(recorder.results, f, indent=4)
+        print("Saved baseline to", args.baseline)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare_to_baseline(recorder.results, baseline, args.threshold, args.min_time)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+
+    print("No regressions against", args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
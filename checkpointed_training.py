@@ -0,0 +1,392 @@
+""" Checkpointed, resumable training of CTGAN and TVAE (sdv 1.2, ctgan 0.7).
+
+ctgan's fit builds the networks and optimizers and runs every epoch in a single call, so an
+interrupted job loses all of its training. The trainers below run the same steps as CTGAN.fit
+and TVAE.fit one epoch at a time. Every checkpoint_every epochs they write a checkpoint with
+the sdv synthesizer (which holds the model being trained), the states of the networks and
+optimizers that only live during training, and the random states. The transformed training
+data is written once per run, next to the checkpoint. Training resumed from a checkpoint
+continues exactly where it stopped.
+"""
+from contextlib import contextmanager, nullcontext
+import datetime
+import importlib.metadata
+import os
+import random
+import numpy as np
+from data_io import temporary_path
+
+class CTGANTrainer:
+    """ CTGAN.fit, split into epochs
+
+    Attributes:
+        model: ctgan CTGAN model being trained
+        train_data: Training data, transformed by the model's DataTransformer
+        epochs: Number of epochs to train for
+        discriminator: Discriminator network
+        optimizer_g: Adam optimizer of the generator
+        optimizer_d: Adam optimizer of the discriminator
+    """
+
+    @classmethod
+    def start(cls, model, processed_data, discrete_columns):
+        """ Fits the data transformer and builds the generator of a new model """
+        from ctgan.data_sampler import DataSampler
+        from ctgan.data_transformer import DataTransformer
+        from ctgan.synthesizers.ctgan import Generator
+
+        model._validate_discrete_columns(processed_data, discrete_columns)
+        model._transformer = DataTransformer()
+        model._transformer.fit(processed_data, discrete_columns)
+        train_data = model._transformer.transform(processed_data)
+
+        model._data_sampler = DataSampler(train_data, model._transformer.output_info_list, model._log_frequency)
+        model._generator = Generator(
+            model._embedding_dim + model._data_sampler.dim_cond_vec(),
+            model._generator_dim,
+            model._transformer.output_dimensions
+        ).to(model._device)
+        return cls(model, train_data)
+
+    def __init__(self, model, train_data):
+        import torch
+        from torch import optim
+        from ctgan.data_sampler import DataSampler
+        from ctgan.synthesizers.ctgan import Discriminator
+
+        self.model = model
+        self.train_data = train_data
+        self.epochs = model._epochs
+
+        # Checkpoints leave out the data sampler, it is rebuilt from the training data
+        if model._data_sampler is None:
+            model._data_sampler = DataSampler(train_data, model._transformer.output_info_list, model._log_frequency)
+
+        self.discriminator = Discriminator(
+            model._transformer.output_dimensions + model._data_sampler.dim_cond_vec(),
+            model._discriminator_dim,
+            pac=model.pac
+        ).to(model._device)
+        self.optimizer_g = optim.Adam(
+            model._generator.parameters(), lr=model._generator_lr, betas=(0.5, 0.9),
+            weight_decay=model._generator_decay
+        )
+        self.optimizer_d = optim.Adam(
+            self.discriminator.parameters(), lr=model._discriminator_lr, betas=(0.5, 0.9),
+            weight_decay=model._discriminator_decay
+        )
+
+        self.mean = torch.zeros(model._batch_size, model._embedding_dim, device=model._device)
+        self.std = self.mean + 1
+        self.steps_per_epoch = max(len(train_data) // model._batch_size, 1)
+
+    def state_dict(self):
+        return {
+            "discriminator": self.discriminator.state_dict(),
+            "optimizer_g": self.optimizer_g.state_dict(),
+            "optimizer_d": self.optimizer_d.state_dict(),
+        }
+
+    def load_state_dict(self, state):
+        self.discriminator.load_state_dict(state["discriminator"])
+        self.optimizer_g.load_state_dict(state["optimizer_g"])
+        self.optimizer_d.load_state_dict(state["optimizer_d"])
+
+    @contextmanager
+    def excluding_data(self):
+        """ Detaches the data sampler, which holds the training data, while the model is checkpointed """
+        data_sampler = self.model._data_sampler
+        self.model._data_sampler = None
+        try:
+            yield
+        finally:
+            self.model._data_sampler = data_sampler
+
+    def train_epoch(self, epoch):
+        import torch
+
+        model = self.model
+        device = model._device
+        batch_size = model._batch_size
+
+        for _ in range(self.steps_per_epoch):
+            for _ in range(model._discriminator_steps):
+                fakez = torch.normal(mean=self.mean, std=self.std)
+
+                condvec = model._data_sampler.sample_condvec(batch_size)
+                if condvec is None:
+                    c1, m1, col, opt = None, None, None, None
+                    real = model._data_sampler.sample_data(batch_size, col, opt)
+                else:
+                    c1, m1, col, opt = condvec
+                    c1 = torch.from_numpy(c1).to(device)
+                    m1 = torch.from_numpy(m1).to(device)
+                    fakez = torch.cat([fakez, c1], dim=1)
+
+                    perm = np.arange(batch_size)
+                    np.random.shuffle(perm)
+                    real = model._data_sampler.sample_data(batch_size, col[perm], opt[perm])
+                    c2 = c1[perm]
+
+                fake = model._generator(fakez)
+                fakeact = model._apply_activate(fake)
+
+                real = torch.from_numpy(real.astype("float32")).to(device)
+
+                if c1 is not None:
+                    fake_cat = torch.cat([fakeact, c1], dim=1)
+                    real_cat = torch.cat([real, c2], dim=1)
+                else:
+                    real_cat = real
+                    fake_cat = fakeact
+
+                y_fake = self.discriminator(fake_cat)
+                y_real = self.discriminator(real_cat)
+
+                pen = self.discriminator.calc_gradient_penalty(real_cat, fake_cat, device, model.pac)
+                loss_d = -(torch.mean(y_real) - torch.mean(y_fake))
+
+                self.optimizer_d.zero_grad(set_to_none=False)
+                pen.backward(retain_graph=True)
+                loss_d.backward()
+                self.optimizer_d.step()
+
+            fakez = torch.normal(mean=self.mean, std=self.std)
+            condvec = model._data_sampler.sample_condvec(batch_size)
+
+            if condvec is None:
+                c1, m1, col, opt = None, None, None, None
+            else:
+                c1, m1, col, opt = condvec
+                c1 = torch.from_numpy(c1).to(device)
+                m1 = torch.from_numpy(m1).to(device)
+                fakez = torch.cat([fakez, c1], dim=1)
+
+            fake = model._generator(fakez)
+            fakeact = model._apply_activate(fake)
+
+            if c1 is not None:
+                y_fake = self.discriminator(torch.cat([fakeact, c1], dim=1))
+            else:
+                y_fake = self.discriminator(fakeact)
+
+            if condvec is None:
+                cross_entropy = 0
+            else:
+                cross_entropy = model._cond_loss(fake, c1, m1)
+
+            loss_g = -torch.mean(y_fake) + cross_entropy
+
+            self.optimizer_g.zero_grad(set_to_none=False)
+            loss_g.backward()
+            self.optimizer_g.step()
+
+        if model._verbose:
+            print(f"Epoch {epoch + 1}, Loss G: {loss_g.detach().cpu(): .4f},"
+                  f"Loss D: {loss_d.detach().cpu(): .4f}", flush=True)
+
+class TVAETrainer:
+    """ TVAE.fit, split into epochs
+
+    Attributes:
+        model: ctgan TVAE model being trained
+        train_data: Training data, transformed by the model's DataTransformer
+        epochs: Number of epochs to train for
+        encoder: Encoder network
+        optimizer: Adam optimizer of the encoder and decoder
+    """
+
+    @classmethod
+    def start(cls, model, processed_data, discrete_columns):
+        """ Fits the data transformer of a new model """
+        from ctgan.data_transformer import DataTransformer
+
+        model.transformer = DataTransformer()
+        model.transformer.fit(processed_data, discrete_columns)
+        return cls(model, model.transformer.transform(processed_data))
+
+    def __init__(self, model, train_data):
+        import torch
+        from torch.optim import Adam
+        from torch.utils.data import DataLoader, TensorDataset
+        from ctgan.synthesizers.tvae import Decoder, Encoder
+
+        self.model = model
+        self.train_data = train_data
+        self.epochs = model.epochs
+
+        dataset = TensorDataset(torch.from_numpy(train_data.astype("float32")).to(model._device))
+        self.loader = DataLoader(dataset, batch_size=model.batch_size, shuffle=True, drop_last=False)
+
+        data_dim = model.transformer.output_dimensions
+        self.encoder = Encoder(data_dim, model.compress_dims, model.embedding_dim).to(model._device)
+        # A model restored from a checkpoint already has its decoder
+        if getattr(model, "decoder", None) is None:
+            model.decoder = Decoder(model.embedding_dim, model.decompress_dims, data_dim).to(model._device)
+
+        self.optimizer = Adam(
+            list(self.encoder.parameters()) + list(model.decoder.parameters()),
+            weight_decay=model.l2scale)
+
+    def state_dict(self):
+        return {
+            "encoder": self.encoder.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+        }
+
+    def load_state_dict(self, state):
+        self.encoder.load_state_dict(state["encoder"])
+        self.optimizer.load_state_dict(state["optimizer"])
+
+    def excluding_data(self):
+        """ The model holds no training data """
+        return nullcontext()
+
+    def train_epoch(self, epoch):
+        import torch
+        from ctgan.synthesizers.tvae import _loss_function
+
+        model = self.model
+        for data in self.loader:
+            self.optimizer.zero_grad()
+            real = data[0].to(model._device)
+            mu, std, logvar = self.encoder(real)
+            eps = torch.randn_like(std)
+            emb = eps * std + mu
+            rec, sigmas = model.decoder(emb)
+            loss_1, loss_2 = _loss_function(
+                rec, real, sigmas, mu, logvar,
+                model.transformer.output_info_list, model.loss_factor
+            )
+            loss = loss_1 + loss_2
+            loss.backward()
+            self.optimizer.step()
+            model.decoder.sigma.data.clamp_(0.01, 1.0)
+
+def _get_random_states():
+    import torch
+
+    states = {"random": random.getstate(), "numpy": np.random.get_state(), "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        states["cuda"] = torch.cuda.get_rng_state_all()
+    return states
+
+def _set_random_states(states):
+    import torch
+
+    random.setstate(states["random"])
+    np.random.set_state(states["numpy"])
+    torch.set_rng_state(states["torch"])
+    if "cuda" in states and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(states["cuda"])
+
+def training_data_path(checkpoint_path):
+    """ File holding the transformed training data of a checkpointed run """
+    return f"{checkpoint_path}.data.npy"
+
+def save_training_data(checkpoint_path, train_data):
+    """ Writes the transformed training data of a run, once before its first checkpoint """
+    path = training_data_path(checkpoint_path)
+    tmp_path = temporary_path(path)
+    with open(tmp_path, "wb") as f:
+        np.save(f, train_data)
+    os.replace(tmp_path, path)
+
+def save_checkpoint(checkpoint_path, synthesizer, trainer, epoch):
+    """ Writes a checkpoint after `epoch` completed epochs. The checkpoint is written
+    to a temporary file first, so an interrupted write never replaces the last good one.
+    """
+    import cloudpickle
+
+    tmp_path = temporary_path(checkpoint_path)
+    with trainer.excluding_data(), open(tmp_path, "wb") as f:
+        cloudpickle.dump({
+            "epoch": epoch,
+            "synthesizer": synthesizer,
+            "trainer_class": type(trainer),
+            "trainer_state": trainer.state_dict(),
+            "random_states": _get_random_states(),
+        }, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def _mark_fitted(synthesizer):
+    """ Sets what sdv's fit_processed_data sets once the model is trained """
+    synthesizer._fitted = True
+    synthesizer._fitted_date = datetime.datetime.today().strftime("%Y-%m-%d")
+    synthesizer._fitted_sdv_version = importlib.metadata.version("sdv")
+
+def _train(synthesizer, trainer, start_epoch, checkpoint_path, checkpoint_every):
+    # A resumed run has written its training data already
+    data_saved = start_epoch > 0
+    for epoch in range(start_epoch, trainer.epochs):
+        trainer.train_epoch(epoch)
+
+        completed = epoch + 1
+        if checkpoint_path is not None and completed % checkpoint_every == 0 and completed < trainer.epochs:
+            if not data_saved:
+                save_training_data(checkpoint_path, trainer.train_data)
+                data_saved = True
+            save_checkpoint(checkpoint_path, synthesizer, trainer, completed)
+            print(f"Saved checkpoint after {completed} of {trainer.epochs} epochs")
+
+    _mark_fitted(synthesizer)
+
+    # The trained model is returned (and cached by SynPiper), the checkpoint is no longer needed
+    if checkpoint_path is not None:
+        for path in (checkpoint_path, training_data_path(checkpoint_path)):
+            if os.path.exists(path):
+                os.remove(path)
+    return synthesizer
+
+def fit_checkpointed(synthesizer, real_data, model_class, trainer_class, checkpoint_path=None,
+                     checkpoint_every=50):
+    """ Equivalent to synthesizer.fit(real_data) for an sdv CTGANSynthesizer or TVAESynthesizer,
+    writing a checkpoint every checkpoint_every epochs.
+
+    Args:
+        synthesizer: sdv synthesizer to fit
+        real_data (Dataframe): Training data
+        model_class: ctgan model class wrapped by the synthesizer (CTGAN or TVAE)
+        trainer_class: Trainer of the model class (CTGANTrainer or TVAETrainer)
+        checkpoint_path: File where checkpoints are written, None to train without checkpoints
+        checkpoint_every (Integer): Number of epochs between checkpoints
+
+    Returns:
+        synthesizer: The fitted synthesizer
+    """
+    from sdv.single_table.utils import detect_discrete_columns
+
+    # As sdv's fit, up to training the model in fit_processed_data
+    synthesizer._fitted = False
+    synthesizer._data_processor.reset_sampling()
+    synthesizer._random_state_set = False
+    processed_data = synthesizer._preprocess(real_data)
+    if processed_data.empty:
+        _mark_fitted(synthesizer)
+        return synthesizer
+
+    discrete_columns = detect_discrete_columns(synthesizer.get_metadata(), processed_data)
+
+    synthesizer._model = model_class(**synthesizer._model_kwargs)
+    trainer = trainer_class.start(synthesizer._model, processed_data, discrete_columns)
+    return _train(synthesizer, trainer, 0, checkpoint_path, checkpoint_every)
+
+def resume_checkpointed(checkpoint_path, checkpoint_every=50):
+    """ Continues fit_checkpointed from the checkpoint in checkpoint_path
+
+    Returns:
+        synthesizer: The fitted synthesizer
+    """
+    import cloudpickle
+
+    with open(checkpoint_path, "rb") as f:
+        checkpoint = cloudpickle.load(f)
+
+    synthesizer = checkpoint["synthesizer"]
+    train_data = np.load(training_data_path(checkpoint_path))
+    trainer = checkpoint["trainer_class"](synthesizer._model, train_data)
+    trainer.load_state_dict(checkpoint["trainer_state"])
+    _set_random_states(checkpoint["random_states"])
+
+    print(f"Resuming training after {checkpoint['epoch']} of {trainer.epochs} epochs")
+    return _train(synthesizer, trainer, checkpoint["epoch"], checkpoint_path, checkpoint_every)
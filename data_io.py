@@ -0,0 +1,222 @@
+import os
+import pandas as pd
+
+# Supported table formats, their file extension, display name and download mime type
+FORMAT_EXTENSIONS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+FORMAT_LABELS = {
+    "csv": "CSV",
+    "parquet": "Parquet",
+    "feather": "Feather",
+}
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "feather": "application/vnd.apache.arrow.file",
+}
+
+CSV_COMPRESSIONS = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".zip": "zip",
+    ".xz": "xz",
+    ".zst": "zstd",
+}
+
+# File extensions accepted by the upload widgets, i.e. every extension table_format reads.
+# The widgets only check the last extension, compressed files must be named like data.csv.gz
+UPLOAD_TYPES = ["csv", "parquet", "pq", "feather", "arrow"] + [suffix[1:] for suffix in CSV_COMPRESSIONS]
+
+def _source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source).lower()
+
+    # File-like objects such as Streamlit uploads carry their file name
+    name = getattr(source, "name", None)
+    if not isinstance(name, str):
+        raise ValueError("Unable to infer the file format, please specify file_format.")
+    return name.lower()
+
+def _csv_compression(source):
+    """ Compression of a csv source, as expected by pandas.
+    Paths are left to pandas to infer, file-like objects are matched on their name.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return "infer"
+    if not isinstance(getattr(source, "name", None), str):
+        return None
+
+    name = _source_name(source)
+    for suffix, compression in CSV_COMPRESSIONS.items():
+        if name.endswith(".csv" + suffix):
+            return compression
+    return None
+
+def table_format(source):
+    """ Infers the table format (csv, parquet or feather) from a file name.
+    Compressed csv files (e.g. data.csv.gz) are treated as csv.
+
+    Args:
+        source (Path or file-like object): File path, or an object with a `name` attribute
+
+    Returns:
+        file_format (String): One of FORMAT_EXTENSIONS
+    """
+    name = _source_name(source)
+    if any(name.endswith(".csv" + suffix) for suffix in CSV_COMPRESSIONS):
+        return "csv"
+
+    ext = os.path.splitext(name)[1]
+    if ext == ".csv":
+        return "csv"
+    elif ext in (".parquet", ".pq"):
+        return "parquet"
+    elif ext in (".feather", ".arrow"):
+        return "feather"
+    elif ext in CSV_COMPRESSIONS:
+        raise ValueError(f"Compressed files must be csv files named like data.csv{ext}: {name}")
+    else:
+        raise ValueError(f"Unsupported file format: {name}")
+
+def working_extension(source):
+    """ File extension for working copies of a source.
+    Columnar sources keep their format, compressed csv is decompressed to plain csv.
+    """
+    return FORMAT_EXTENSIONS[table_format(source)]
+
+def temporary_path(path):
+    """ Hidden sibling of `path` with the same extension, used to write outputs before
+    moving them into place with os.replace.
+    """
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".tmp.{name}")
+
+def read_table(source, file_format=None, columns=None):
+    """ Reads a csv (optionally compressed), Parquet or Feather file into a dataframe.
+    Parquet and Feather preserve the column dtypes they were written with.
+
+    Args:
+        source (Path or file-like object): File to read
+        file_format (String): Format of the file, inferred from the file name if None
+        columns (List): Subset of columns to read, all columns if None
+
+    Returns:
+        df (Dataframe): Table contents
+    """
+    file_format = file_format or table_format(source)
+
+    if file_format == "csv":
+        return pd.read_csv(source, usecols=columns, compression=_csv_compression(source))
+    elif file_format == "parquet":
+        return pd.read_parquet(source, columns=columns)
+    elif file_format == "feather":
+        return pd.read_feather(source, columns=columns)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+def write_table(df, path, file_format=None):
+    """ Writes a dataframe to a csv (compressed if the path ends in e.g. .csv.gz),
+    Parquet or Feather file. The index is not written.
+
+    Args:
+        df (Dataframe): Table to write
+        path (Path): File Path of the output
+        file_format (String): Format of the file, inferred from the file name if None
+    """
+    file_format = file_format or table_format(path)
+
+    if file_format == "csv":
+        df.to_csv(path, index=False)
+    elif file_format == "parquet":
+        df.to_parquet(path, index=False)
+    elif file_format == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+def iter_table_chunks(source, chunksize, file_format=None, dtype=None):
+    """ Reads a table one chunk of rows at a time.
+
+    Args:
+        source (Path or file-like object): File to read
+        chunksize (Integer): Number of rows per chunk (Feather files are read per record batch)
+        file_format (String): Format of the file, inferred from the file name if None
+        dtype (Dictionary): Column dtypes, only used for csv
+
+    Yields:
+        chunk (Dataframe): Consecutive rows of the table
+    """
+    file_format = file_format or table_format(source)
+
+    if file_format == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=dtype, compression=_csv_compression(source))
+
+    elif file_format == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+    elif file_format == "feather":
+        import pyarrow.ipc as ipc
+        reader = ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).to_pandas()
+
+    else:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+class ChunkedTableWriter:
+    """ Writes a table incrementally, one dataframe chunk at a time.
+    All chunks must share the columns (and, for Parquet / Feather, the dtypes) of the first chunk.
+    Nothing is written to disk until the first chunk arrives.
+
+    Attributes:
+        path: File Path of the output
+        file_format: Format of the output (csv, parquet or feather)
+    """
+
+    def __init__(self, path, file_format=None):
+        self.path = path
+        self.file_format = file_format or table_format(path)
+        self._writer = None
+        self._schema = None
+        self._started = False
+
+    def write(self, df):
+        if self.file_format == "csv":
+            df.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+
+        elif self.file_format in ("parquet", "feather"):
+            import pyarrow as pa
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+
+            if self._writer is None:
+                self._schema = table.schema
+                if self.file_format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.path, self._schema)
+
+            self._writer.write_table(table)
+
+        else:
+            raise ValueError(f"Unsupported file format: {self.file_format}")
+
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,50 +1,61 @@
 import streamlit as st
 import os
 import pandas as pd
-from run import *
-from utils import train_val_split
+from SynPiper import SynPiper
+from registry import SYNTHESIZERS
+from utils import split_to_files
+from data_io import UPLOAD_TYPES, FORMAT_LABELS, MIME_TYPES, iter_table_chunks, read_table, table_format, working_extension
 #streamlit run c:/Users/User/Desktop/SynPiper-master/about.py
 
+@st.cache_data(max_entries=3)
+def read_working_file(path, mtime_ns):
+    """ Contents of a working file for its download button, re-read only when the file changes.
+    st.download_button needs the whole file in memory, so downloads are not streamed.
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
 if __name__ == '__main__':
     st.title("Create a New Synthesizer")
 
     st.subheader("File Upload")
 
-    uploaded_data = st.file_uploader("Upload your file here...", type=["csv"])
+    uploaded_data = st.file_uploader("Upload your file here...", type=UPLOAD_TYPES)
 
     cwd = os.getcwd()
     workingpath = os.path.join(cwd, "workingfolder")
     os.makedirs(workingpath, exist_ok=True)
-
-    # Creation of Filepaths
-    synthetic_filepath = os.path.join(workingpath, "synthetic.csv")
-    path_of_df_train = os.path.join(workingpath, "df_train.csv")
-    path_of_df_val = os.path.join(workingpath, "df_val.csv")
     
     try: 
-    # Navigates to Parent Directory
-        uploaded_data = pd.read_csv(uploaded_data)
+        # Creation of Filepaths (working files keep the format of the upload)
+        ext = working_extension(uploaded_data)
+        working_format = table_format(uploaded_data)
+        synthetic_filepath = os.path.join(workingpath, f"synthetic{ext}")
+        path_of_df_train = os.path.join(workingpath, f"df_train{ext}")
+        path_of_df_val = os.path.join(workingpath, f"df_val{ext}")
+
+        df_preview = next(iter_table_chunks(uploaded_data, chunksize = 5)).head()
+        uploaded_data.seek(0)
         
         st.subheader("Preview of Dataset")
-        st.dataframe(uploaded_data.head())
+        st.dataframe(df_preview)
         
         target = st.selectbox(label = "Target Column", 
-                              options = uploaded_data.columns)
+                              options = df_preview.columns)
         target_expander = st.expander("No target column?")
         target_expander.write("""
                 Pick any categorical column as the target column if there is no target column.
         """)
 
-        # Train - Holdout set Split
-        df_train, df_val = train_val_split(uploaded_data, 
-                                           target, 
-                                           ratio = 0.7) 
-        
-        df_train.to_csv(path_or_buf = path_of_df_train, index = False)
-        df_val.to_csv(path_or_buf = path_of_df_val, index = False)
+        # Train - Holdout set Split (skipped on reruns with the same upload and target)
+        split_to_files(uploaded_data, 
+                       target, 
+                       ratio = 0.7,
+                       train_path = path_of_df_train,
+                       val_path = path_of_df_val)
 
         ### COLUMNS ###
-        avail_cols = df_train.columns
+        avail_cols = df_preview.columns
 
         cat_cols = st.multiselect(label="Categorical Features", 
                                 options=avail_cols)
@@ -61,6 +72,7 @@ if __name__ == '__main__':
 
         all_cols = cat_cols + num_cols
         datatypes_lst = ["Categorical"] * len(cat_cols) + ["Numerical"] * len(num_cols)
+        df_train = read_table(path_of_df_train, columns = all_cols)
         unique_vals_lst = [len(df_train[col].unique()) for col in all_cols]
         df_summary = pd.DataFrame(
             {
@@ -75,68 +87,41 @@ if __name__ == '__main__':
         ### SYNTHESIZER ###
         st.subheader("Select Synthesizer")
 
+        model_dict = {spec.label: name for name, spec in SYNTHESIZERS.items()}
+
         model_name = st.selectbox(
             label="synthesizer",
-            options=["Differentially Private Synthesizer",
-                        "CTGAN",
-                        "TVAE"],
+            options=list(model_dict.keys()),
             label_visibility= "collapsed"
         )
 
         st.caption(f"{model_name} has been selected.")
-
-        model_dict = {
-            "Differentially Private Synthesizer": "dpsynthesizer",
-            "CTGAN" : "ctgan",
-            "TVAE" : "tvae"   
-        } 
             
         synthesizer_name = model_dict[model_name]
 
         st.subheader("Choose Parameters")
-        ready_to_train = False # When True: activate the Train Button
-
-        ### DPSynthesizer
-        if synthesizer_name == "dpsynthesizer":
-            degree_of_bayesian_networks = st.number_input(
-                label="Number of Bayesian Networks", min_value=2, max_value=10
-            )
-            network_expander = st.expander("See bayesian network parameter configuration")
-            network_expander.write("""
-                Advised number of networks to pick: 2 \n
-                Picking a high number of networks works better for larger dimensionality datasets.
-            """)
-
-            epsilon = st.slider(label="Epsilon Value", min_value= 0.0, max_value= 3.0)
-            epsilon_expander = st.expander("See epsilon parameter configuration")
-            epsilon_expander.write("""
-                To turn off Differential Privacy, pick 0. \n
-                For more privatised synthetic data, pick a small epsilon value like 0.5. \n
-                For less privatised synthetic data with higher fidelity, pick a larger epsilon value.
-            """)
-            ready_to_train = True
 
-            params_required = {
-                "categorical_attributes": cat_cols,
-                "epsilon": epsilon,
-                "degree_of_bayesian_network": degree_of_bayesian_networks,
-            }
+        # Parameter widgets are rendered from the synthesizer's parameter schema
+        params_required = {"categorical_attributes": cat_cols}
 
-        elif synthesizer_name == "ctgan" or synthesizer_name == "tvae":
-            epochs = st.number_input(
-                label="Number of Epochs", min_value = 300, max_value=1500
-            )
+        for param in SYNTHESIZERS[synthesizer_name].params:
+            if param.kind == "int":
+                value = st.number_input(
+                    label=param.label, min_value=param.widget_min_value, max_value=param.widget_max_value,
+                    value=param.default,
+                )
+            else:
+                value = st.slider(
+                    label=param.label, min_value=param.widget_min_value, max_value=param.widget_max_value,
+                    value=param.default,
+                )
 
-            ready_to_train = True
+            if param.help is not None:
+                st.expander(param.help_title).write(param.help)
 
-            params_required = {
-                'categorical_attributes' : cat_cols,
-                'epochs' : epochs
-            }
+            params_required[param.name] = value
 
-        # Implement other Synthesizers here if any.
-        else:
-            pass
+        ready_to_train = True # When True: activate the Train Button
         
         ready_to_download = False
         elapsed_time = "..."
@@ -155,6 +140,15 @@ if __name__ == '__main__':
                     max_value=1000000,
                     label_visibility= "collapsed")
 
+            seed = st.number_input(label = "Seed", min_value = 0, value = 0)
+            seed_expander = st.expander("See seed configuration")
+            seed_expander.write("""
+                Generating with the same data, parameters, number of rows and seed gives the same synthetic data. \n
+                Repeated requests are served from the cache without retraining the synthesizer. \n
+                CTGAN and TVAE training is checkpointed, so generating again after an interrupted run
+                continues training from the last checkpoint.
+            """)
+
             with col2: # Train Button 
                 if st.button(label = "Generate"): 
                     elapsed_time = "Model is running..."
@@ -163,35 +157,30 @@ if __name__ == '__main__':
                         path_of_df_train, 
                         param_dict = params_required, 
                         synthesizer_name = synthesizer_name, 
-                        synthetic_filepath=synthetic_filepath)
+                        synthetic_filepath=synthetic_filepath,
+                        seed = seed,
+                        cache_dir = os.path.join(workingpath, "cache"),
+                        checkpoint_dir = os.path.join(workingpath, "checkpoints"))
                     piper.generate(num_tuples_to_generate = n_rows_input)
                     elapsed_time = piper.elapsed_time
 
-        df_syn = pd.read_csv(synthetic_filepath)
-
-        @st.cache_data
-        def convert_df(df):
-            # IMPORTANT: Cache the conversion to prevent computation on every rerun
-            return df.to_csv(index = 0).encode('utf-8')
-        
-        csv_syn = convert_df(df_syn)
-        st.download_button(label = "Download Synthetic Data as CSV",
-                            data = csv_syn,
-                            file_name = 'df_syn.csv',
-                            mime='text/csv')
-        
-        csv_train = convert_df(df_train)
-        st.download_button(label = "Download Training Real Data as CSV",
-                            data = csv_train,
-                            file_name = 'df_train.csv',
-                            mime='text/csv')
-        
-        csv_holdout = convert_df(df_val)
-        st.download_button(label = "Download Holdout Real Data as CSV",
-                            data = csv_holdout,
-                            file_name = 'df_val.csv',
-                            mime='text/csv')
+        # Downloads are served from the working files on disk, without re-encoding
+        # and without re-reading them on every rerun
+        downloads = [
+            ("Download Synthetic Data", synthetic_filepath, f"df_syn{ext}"),
+            ("Download Training Real Data", path_of_df_train, f"df_train{ext}"),
+            ("Download Holdout Real Data", path_of_df_val, f"df_val{ext}"),
+        ]
+
+        for label, path, file_name in downloads:
+            if os.path.exists(path):
+                st.download_button(label = f"{label} as {FORMAT_LABELS[working_format]}",
+                                    data = read_working_file(path, os.stat(path).st_mtime_ns),
+                                    file_name = file_name,
+                                    mime = MIME_TYPES[working_format])
 
         st.text(f"Elapsed Time: {elapsed_time}")        
-    except:
-        st.caption("")
\ No newline at end of file
+    except Exception as e:
+        # Nothing to show until a file is uploaded, errors with an upload are reported
+        if uploaded_data is not None:
+            st.error(e)
\ No newline at end of file
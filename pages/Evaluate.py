@@ -1,15 +1,15 @@
 import streamlit as st
-import pandas as pd
 from synthetic_evaluation import *
 from utils import count_exact_match_rows
+from data_io import UPLOAD_TYPES, read_table
 import numpy as np
 
-df_train = st.file_uploader("Upload Real Training Data", type=["csv"])
-df_syn = st.file_uploader("Upload Synthetic Data", type = ["csv"])
+df_train = st.file_uploader("Upload Real Training Data", type=UPLOAD_TYPES)
+df_syn = st.file_uploader("Upload Synthetic Data", type = UPLOAD_TYPES)
 
 try: 
-    df_train = pd.read_csv(df_train)
-    df_syn = pd.read_csv(df_syn)
+    df_train = read_table(df_train)
+    df_syn = read_table(df_syn)
 
     # Running of Streamlit App
     st.title("Synthetic Data Quality Assurance Report")
@@ -81,5 +81,8 @@ try:
     for col in df_train.columns:
         st.plotly_chart(plot_real_synthetic(df_train, df_syn, col))
 
-except ValueError:
-    st.text("Upload both datafiles to proceed")
+except ValueError as e:
+    if df_train is None or df_syn is None:
+        st.text("Upload both datafiles to proceed")
+    else:
+        st.error(e)
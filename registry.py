@@ -0,0 +1,259 @@
+import importlib
+import numbers
+import shutil
+
+class ParamSpec:
+    """ Describes a synthesizer parameter, used to validate it and to render its input widget.
+
+    Attributes:
+        name: Key of the parameter in param_dict
+        label: Label of the input widget
+        kind: "int" (number input) or "float" (slider)
+        min_value: Smallest allowed value
+        max_value: Largest allowed value
+        widget_min_value: Smallest value offered by the input widget (defaults to min_value)
+        widget_max_value: Largest value offered by the input widget (defaults to max_value)
+        default: Initial value of the input widget (defaults to widget_min_value)
+        help_title: Title of the expander holding the help text
+        help: Help text (optional)
+    """
+
+    def __init__(self, name, label, kind, min_value, max_value, default=None, help_title=None, help=None,
+                 widget_min_value=None, widget_max_value=None):
+        self.name = name
+        self.label = label
+        self.kind = kind
+        self.min_value = min_value
+        self.max_value = max_value
+        self.widget_min_value = min_value if widget_min_value is None else widget_min_value
+        self.widget_max_value = max_value if widget_max_value is None else widget_max_value
+        self.default = self.widget_min_value if default is None else default
+        self.help_title = help_title
+        self.help = help
+
+    def validate(self, value):
+        """ Raises ValueError if value is not of the parameter's kind and range """
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise ValueError(f"{self.label} ({self.name}) must be a number, got {value!r}.")
+        if self.kind == "int" and value != int(value):
+            raise ValueError(f"{self.label} ({self.name}) must be an integer, got {value}.")
+        if not self.min_value <= value <= self.max_value:
+            raise ValueError(
+                f"{self.label} ({self.name}) must be between {self.min_value} and {self.max_value}, got {value}."
+            )
+
+class SynthesizerSpec:
+    """ Declares everything SynPiper and the pages need to know about a synthesizer.
+    Heavy libraries are only imported by the processor and the hooks, on first use.
+
+    Attributes:
+        name: Name of Synthesizer, as passed to SynPiper
+        label: Display name in the user interface
+        processor: Import path of the Processor class, as "module:ClassName"
+        params: List of ParamSpec (categorical_attributes is shared by all synthesizers)
+        fit: Hook fit(piper) -> model, trains on piper.data_path using the output of piper.process()
+        sample: Hook sample(piper, model, num_tuples_to_generate, conditions, seed) -> synthetic Dataframe,
+            conditions being a dictionary of column name to fixed value (or None), seed the seed of
+            the synthesizer's own random number generator (or None for its default)
+        budget_param: Parameter scaled down for low-budget trials of a sweep,
+            None to subsample the data instead
+        save_model: Hook save_model(model, path) storing a trained model in the sample cache (optional)
+        load_model: Hook load_model(path) -> model, reverting save_model (optional)
+        resume: Hook resume(piper) -> model, continuing the training checkpointed by fit
+            in piper.checkpoint_path (optional, fit then writes checkpoints when it is set)
+        process: Hook process(piper) -> processed training data handed to fit
+            (optional, defaults to piper.processor.process())
+    """
+
+    def __init__(self, name, label, processor, params, fit, sample, budget_param=None,
+                 save_model=None, load_model=None, resume=None, process=None):
+        self.name = name
+        self.label = label
+        self.processor = processor
+        self.params = params
+        self.fit = fit
+        self.sample = sample
+        self.budget_param = budget_param
+        self.save_model = save_model
+        self.load_model = load_model
+        self.resume = resume
+        self.process = process
+
+    def validate_params(self, param_dict):
+        """ Checks param_dict against the parameter schema: categorical_attributes and every
+        parameter in params must be given, in range, and nothing else.
+        """
+        names = ["categorical_attributes"] + [param.name for param in self.params]
+        for name in param_dict:
+            if name not in names:
+                raise ValueError("Unspecified Parameter, Please follow the correct naming convention")
+
+        for name in names:
+            if name not in param_dict:
+                raise ValueError(f"Missing Parameter: {name}")
+
+        for param in self.params:
+            param.validate(param_dict[param.name])
+
+    def load_processor(self):
+        """ Imports and returns the Processor class """
+        module_name, class_name = self.processor.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+
+SYNTHESIZERS = {}
+
+def register_synthesizer(spec):
+    """ Adds a synthesizer to the registry, making it available to SynPiper and the pages """
+    SYNTHESIZERS[spec.name] = spec
+    return spec
+
+def get_synthesizer(synthesizer_name):
+    """ Looks up a registered synthesizer by name """
+    if synthesizer_name not in SYNTHESIZERS:
+        raise ValueError("Unspecified Synthesizer Name inputted.")
+    return SYNTHESIZERS[synthesizer_name]
+
+# CTGAN and TVAE (belonging to Synthetic Data Vault (sdv) library)
+def _fit_ctgan(piper):
+    from ctgan import CTGAN
+    from sdv.single_table import CTGANSynthesizer
+    from checkpointed_training import CTGANTrainer
+    return _fit_sdv(piper, CTGANSynthesizer, CTGAN, CTGANTrainer, verbose=True)
+
+def _fit_tvae(piper):
+    from ctgan import TVAE
+    from sdv.single_table import TVAESynthesizer
+    from checkpointed_training import TVAETrainer
+    return _fit_sdv(piper, TVAESynthesizer, TVAE, TVAETrainer)
+
+def _fit_sdv(piper, synthesizer_class, model_class, trainer_class, **kwargs):
+    from checkpointed_training import fit_checkpointed
+    from data_io import read_table
+
+    metadata = piper.process()
+    real_data = read_table(piper.data_path)
+
+    synthesizer = synthesizer_class(metadata, epochs=piper.param_dict["epochs"], **kwargs)
+
+    print("Starting Generator Training")
+    fit_checkpointed(synthesizer, real_data, model_class, trainer_class,
+                     checkpoint_path=piper.checkpoint_path, checkpoint_every=piper.checkpoint_every)
+    print("Generator Training Completed")
+    return synthesizer
+
+def _resume_sdv(piper):
+    from checkpointed_training import resume_checkpointed
+
+    synthesizer = resume_checkpointed(piper.checkpoint_path, checkpoint_every=piper.checkpoint_every)
+    print("Generator Training Completed")
+    return synthesizer
+
+def _sample_sdv(piper, synthesizer, num_tuples_to_generate, conditions=None, seed=None):
+    # sdv samples with the model's own random state, which it otherwise seeds with a fixed
+    # value on the first call and carries over between calls
+    if seed is not None:
+        synthesizer._set_random_state(seed)
+
+    print(f"Generating {num_tuples_to_generate} rows of Synthetic Data.")
+    if not conditions:
+        return synthesizer.sample(num_tuples_to_generate)
+
+    from sdv.sampling import Condition
+    condition = Condition(num_rows=num_tuples_to_generate, column_values=conditions)
+    return synthesizer.sample_from_conditions([condition])
+
+def _save_sdv(synthesizer, path):
+    synthesizer.save(path)
+
+def _load_sdv(path):
+    from sdv.single_table.base import BaseSynthesizer
+    return BaseSynthesizer.load(path)
+
+# DataSynthesizer's Library
+def _process_dpsynthesizer(piper):
+    description_file = piper.processor.process(seed=0 if piper.seed is None else piper.seed)
+    print("DP Synthesizer Processing Complete")
+    return description_file
+
+def _fit_dpsynthesizer(piper):
+    # The description file learnt by the processor is the trained model
+    return piper.process()
+
+def _sample_dpsynthesizer(piper, description_file, num_tuples_to_generate, conditions=None, seed=None):
+    from DataSynthesizer.DataGenerator import DataGenerator
+
+    if conditions:
+        raise ValueError("Conditional sampling is not supported by the Differentially Private Synthesizer.")
+
+    generator = DataGenerator()
+    print(f"Generating {num_tuples_to_generate} rows of Synthetic Data.")
+    # DataGenerator reseeds the global random number generators on every call (with 0 by default)
+    generator.generate_dataset_in_correlated_attribute_mode(
+        num_tuples_to_generate, description_file, seed=0 if seed is None else seed
+    )
+    return generator.synthetic_dataset
+
+def _save_dpsynthesizer(description_file, path):
+    shutil.copyfile(description_file, path)
+
+def _load_dpsynthesizer(path):
+    return path
+
+# Low epoch counts are allowed for sweeps and benchmarks, the widget starts at 300
+EPOCHS_PARAM = ParamSpec("epochs", "Number of Epochs", "int", min_value=1, max_value=1500, widget_min_value=300)
+
+register_synthesizer(SynthesizerSpec(
+    name="dpsynthesizer",
+    label="Differentially Private Synthesizer",
+    processor="Processor:DataSynthesizerProcessor",
+    params=[
+        ParamSpec(
+            "degree_of_bayesian_network", "Number of Bayesian Networks", "int", min_value=2, max_value=10,
+            help_title="See bayesian network parameter configuration",
+            help="""
+                Advised number of networks to pick: 2 \n
+                Picking a high number of networks works better for larger dimensionality datasets.
+            """,
+        ),
+        ParamSpec(
+            "epsilon", "Epsilon Value", "float", min_value=0.0, max_value=3.0,
+            help_title="See epsilon parameter configuration",
+            help="""
+                To turn off Differential Privacy, pick 0. \n
+                For more privatised synthetic data, pick a small epsilon value like 0.5. \n
+                For less privatised synthetic data with higher fidelity, pick a larger epsilon value.
+            """,
+        ),
+    ],
+    fit=_fit_dpsynthesizer,
+    sample=_sample_dpsynthesizer,
+    save_model=_save_dpsynthesizer,
+    load_model=_load_dpsynthesizer,
+    process=_process_dpsynthesizer,
+))
+
+register_synthesizer(SynthesizerSpec(
+    name="ctgan",
+    label="CTGAN",
+    processor="Processor:SDVProcessor",
+    params=[EPOCHS_PARAM],
+    fit=_fit_ctgan,
+    sample=_sample_sdv,
+    budget_param="epochs",
+    save_model=_save_sdv,
+    load_model=_load_sdv,
+    resume=_resume_sdv,
+))
+
+register_synthesizer(SynthesizerSpec(
+    name="tvae",
+    label="TVAE",
+    processor="Processor:SDVProcessor",
+    params=[EPOCHS_PARAM],
+    fit=_fit_tvae,
+    sample=_sample_sdv,
+    budget_param="epochs",
+    save_model=_save_sdv,
+    load_model=_load_sdv,
+    resume=_resume_sdv,
+))
@@ -1,9 +1,4 @@
-from Processor import SDVProcessor, DataSynthesizerProcessor
 from SynPiper import SynPiper
-import pandas as pd
-import os
-import streamlit as st
-from synthetic_evaluation import *
 """
     These are runnable functions that will be executed when all 
     required parameters have been collected. 
@@ -18,7 +13,7 @@ def run_dpsyn(params_required, num_tuples_to_generate, data_path, synthetic_file
         synthetic_filepath=synthetic_filepath
     )
 
-    piper.generate_dpsynthesizer(num_tuples_to_generate= num_tuples_to_generate)
+    piper.generate(num_tuples_to_generate= num_tuples_to_generate)
 
 
 def run_ctgan(params_required, num_tuples_to_generate, data_path, synthetic_filepath):
@@ -29,7 +24,7 @@ def run_ctgan(params_required, num_tuples_to_generate, data_path, synthetic_file
         synthetic_filepath= synthetic_filepath
     )
     
-    piper.generate_sdv(num_tuples_to_generate = num_tuples_to_generate)
+    piper.generate(num_tuples_to_generate = num_tuples_to_generate)
 
 def run_tvae(params_required, num_tuples_to_generate, data_path, synthetic_filepath):
     piper = SynPiper(
@@ -39,4 +34,4 @@ def run_tvae(params_required, num_tuples_to_generate, data_path, synthetic_filep
         synthetic_filepath= synthetic_filepath
     )
     
-    piper.generate_sdv(num_tuples_to_generate = num_tuples_to_generate)
+    piper.generate(num_tuples_to_generate = num_tuples_to_generate)
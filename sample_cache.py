@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import numpy as np
+from data_io import read_table, write_table, temporary_path
+
+# Samples are drawn in blocks with fixed boundaries and seeds, so the first n rows of a
+# (model, seed, conditions) request are the same however many rows were asked for before.
+# Block 0 holds the first FIRST_BLOCK_ROWS rows, every later block doubles the total.
+FIRST_BLOCK_ROWS = 1000
+
+def sample_blocks(num_rows):
+    """ (start, stop) row ranges of the blocks covering the first num_rows rows """
+    blocks = [(0, FIRST_BLOCK_ROWS)]
+    while blocks[-1][1] < num_rows:
+        stop = blocks[-1][1]
+        blocks.append((stop, 2 * stop))
+    return blocks
+
+def block_seed(seed, block):
+    """ Seed of one block of samples, derived from the request seed """
+    return int(np.random.SeedSequence([seed, block]).generate_state(1)[0])
+
+def file_digest(path):
+    """ SHA-1 of a file's contents """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _key(payload):
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class SampleCache:
+    """ Content-addressed, size-bounded cache of trained models and generated samples.
+    Models are keyed by everything that determines training (synthesizer, parameters,
+    contents of the training data and seed), samples by the model, seed and conditions.
+    Each sample entry holds the longest prefix generated so far. When the cache grows beyond
+    max_bytes, the least recently used entries are evicted.
+
+    Attributes:
+        cache_dir: Directory where the cache entries are stored
+        max_bytes: Maximum total size of the entries
+    """
+
+    def __init__(self, cache_dir, max_bytes=1 << 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def model_key(synthesizer_name, param_dict, data_path, seed):
+        return _key({
+            "synthesizer_name": synthesizer_name,
+            "param_dict": param_dict,
+            "data": file_digest(data_path),
+            "seed": seed,
+        })
+
+    @staticmethod
+    def sample_key(model_key, seed, conditions):
+        return _key({"model": model_key, "seed": seed, "conditions": conditions or {}})
+
+    def model_path(self, model_key):
+        return os.path.join(self.cache_dir, f"model-{model_key}")
+
+    def samples_path(self, sample_key):
+        return os.path.join(self.cache_dir, f"samples-{sample_key}.parquet")
+
+    def touch(self, path):
+        """ Marks an entry as recently used """
+        os.utime(path)
+
+    def load_samples(self, sample_key):
+        """ Cached samples of a request, or None """
+        path = self.samples_path(sample_key)
+        if not os.path.exists(path):
+            return None
+        self.touch(path)
+        return read_table(path)
+
+    def store_samples(self, sample_key, synthetic_data):
+        path = self.samples_path(sample_key)
+        tmp_path = temporary_path(path)
+        write_table(synthetic_data, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def store_model(self, model_key, save_model, model):
+        """ Stores a trained model with the synthesizer's save_model hook """
+        path = self.model_path(model_key)
+        tmp_path = temporary_path(path)
+        save_model(model, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """ Removes the least recently used entries until the cache fits in max_bytes.
+        The entry `keep` (just written) is never evicted.
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp.") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
@@ -0,0 +1,355 @@
+""" Incremental evaluation of synthetic data with mergeable sketches.
+
+The SketchEvaluator keeps compact summaries of the real and synthetic data instead of the
+tables themselves, so new synthetic batches update the scores in O(batch) and synthetic files
+larger than memory can be scored by streaming them in chunks.
+    - Numerical columns: KLL quantile sketches, for the KS-Score
+    - Categorical columns: value counts, for the TVD-Score
+    - Column pairs: contingency counts of binned values, for the mutual information score
+"""
+from collections import Counter
+import pickle
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+from data_io import iter_table_chunks
+
+# Code of missing values in the binned numerical columns
+MISSING_BIN = np.iinfo(np.uint64).max
+
+class KLLSketch:
+    """ KLL quantile sketch (Karnin, Lang and Liberty, 2016) over a stream of numbers.
+    Holds O(k log(n / k)) items. Items at level h stand for 2 ** h values of the stream.
+    Two sketches are merged by concatenating their levels and compacting.
+
+    Attributes:
+        k: Size of the top level, larger k gives more accurate quantiles
+        levels: List of arrays of the items kept at each level
+        n: Number of values seen
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compact(self):
+        while sum(len(items) for items in self.levels) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                # An odd item out stays at this level, every other remaining item is promoted
+                items = np.sort(items)
+                leftover, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+
+                self.levels[h] = leftover
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                break
+
+    def update(self, values):
+        """ Adds an array of values, missing values are ignored """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compact()
+
+    def merge(self, other):
+        """ Adds all values summarised by another sketch """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compact()
+
+    def weighted_items(self):
+        """ Sorted items with the number of stream values each stands for """
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def cdf(self, points):
+        """ Estimated fraction of values less than or equal to each point """
+        items, weights = self.weighted_items()
+        if len(items) == 0:
+            return np.full(len(points), np.nan)
+        cumulative = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum()
+        return cumulative[np.searchsorted(items, points, side="right")]
+
+    def quantiles(self, fractions):
+        """ Estimated values at each fraction (0 to 1) of the stream """
+        items, weights = self.weighted_items()
+        cumulative = np.cumsum(weights) / weights.sum()
+        index = np.minimum(np.searchsorted(cumulative, fractions, side="left"), len(items) - 1)
+        return items[index]
+
+def ks_complement(real_sketch, synthetic_sketch):
+    """ 1 - Kolmogorov-Smirnov statistic between the distributions of two sketches,
+    matching sdmetrics' KSComplement on the full data up to the sketch error.
+    """
+    if real_sketch.n == 0 or synthetic_sketch.n == 0:
+        return np.nan
+    points = np.union1d(real_sketch.weighted_items()[0], synthetic_sketch.weighted_items()[0])
+    statistic = np.max(np.abs(real_sketch.cdf(points) - synthetic_sketch.cdf(points)))
+    return 1 - statistic
+
+def tv_complement(real_counts, synthetic_counts):
+    """ 1 - Total Variation Distance between two value counts,
+    matching sdmetrics' TVComplement on the full data.
+    """
+    real_total = sum(real_counts.values())
+    synthetic_total = sum(synthetic_counts.values())
+    if real_total == 0 or synthetic_total == 0:
+        return np.nan
+
+    tvd = 0.5 * sum(
+        abs(real_counts.get(value, 0) / real_total - synthetic_counts.get(value, 0) / synthetic_total)
+        for value in set(real_counts) | set(synthetic_counts)
+    )
+    return 1 - tvd
+
+def normalized_mutual_info(table):
+    """ Normalised (arithmetic mean) mutual information of a contingency table,
+    following sklearn's normalized_mutual_info_score.
+
+    Args:
+        table (Counter): (code of column a, code of column b) to number of rows
+    """
+    if not table:
+        return np.nan
+
+    pairs = np.array(list(table.keys()), dtype=np.uint64)
+    p_ab = np.array(list(table.values()), dtype=float)
+    p_ab /= p_ab.sum()
+
+    _, a_index = np.unique(pairs[:, 0], return_inverse=True)
+    _, b_index = np.unique(pairs[:, 1], return_inverse=True)
+    p_a = np.bincount(a_index, weights=p_ab)
+    p_b = np.bincount(b_index, weights=p_ab)
+
+    # Both columns constant: perfectly matched, as in sklearn
+    if len(p_a) == 1 and len(p_b) == 1:
+        return 1.0
+
+    mi = np.sum(p_ab * np.log(p_ab / (p_a[a_index] * p_b[b_index])))
+    if mi <= 0:
+        return 0.0
+
+    h_a = -np.sum(p_a * np.log(p_a))
+    h_b = -np.sum(p_b * np.log(p_b))
+    return mi / max((h_a + h_b) / 2, np.finfo(float).eps)
+
+class _TableSketch:
+    """ Summary of one table (real or synthetic) """
+
+    def __init__(self, categorical_columns, numerical_columns, k, seed):
+        self.n_rows = 0
+        self.quantiles = {col: KLLSketch(k=k, seed=seed) for col in numerical_columns}
+        self.counts = {col: Counter() for col in categorical_columns}
+        self.pairs = {}
+
+    def merge(self, other):
+        self.n_rows += other.n_rows
+        for col, sketch in other.quantiles.items():
+            self.quantiles[col].merge(sketch)
+        for col, counts in other.counts.items():
+            self.counts[col].update(counts)
+        for pair, table in other.pairs.items():
+            self.pairs.setdefault(pair, Counter()).update(table)
+
+class SketchEvaluator:
+    """ Scores synthetic data against real data from mergeable sketches.
+    Real and synthetic data are added in batches of any size, in any order. Numerical columns
+    are binned for the mutual information score, with bin edges taken from the quantiles of the
+    first batch seen unless given, so add real data first where possible.
+
+    Attributes:
+        categorical_columns: List of categorical column names
+        numerical_columns: List of numerical column names
+        n_bins: Number of bins of the numerical columns for the mutual information score
+        bin_edges: Dictionary of numerical column name to inner bin edges
+        real: Sketch of the real data
+        synthetic: Sketch of the synthetic data
+    """
+
+    def __init__(self, categorical_columns, numerical_columns, n_bins=20, bin_edges=None, k=200, seed=0):
+        self.categorical_columns = list(categorical_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.columns = self.categorical_columns + self.numerical_columns
+        self.n_bins = n_bins
+        self.bin_edges = bin_edges
+        self.real = _TableSketch(self.categorical_columns, self.numerical_columns, k, seed)
+        self.synthetic = _TableSketch(self.categorical_columns, self.numerical_columns, k, seed + 1)
+
+    def _codes(self, df):
+        """ Integer code of every value: its bin for numerical columns, its hash for categorical columns """
+        if self.bin_edges is None:
+            fractions = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+            self.bin_edges = {}
+            for col in self.numerical_columns:
+                values = df[col].to_numpy(dtype=float)
+                values = values[~np.isnan(values)]
+                self.bin_edges[col] = np.unique(np.quantile(values, fractions)) if len(values) else np.empty(0)
+
+        codes = np.empty((len(df), len(self.columns)), dtype=np.uint64)
+        for i, col in enumerate(self.columns):
+            if col in self.bin_edges:
+                values = df[col].to_numpy(dtype=float)
+                bins = np.searchsorted(self.bin_edges[col], values, side="right").astype(np.uint64)
+                codes[:, i] = np.where(np.isnan(values), MISSING_BIN, bins)
+            else:
+                # Numeric categories are hashed as floats so 1 and 1.0 share a code
+                values = df[col].astype(float) if is_numeric_dtype(df[col]) else df[col]
+                codes[:, i] = pd.util.hash_pandas_object(values, index=False).to_numpy()
+        return codes
+
+    def _update(self, sketch, df):
+        sketch.n_rows += len(df)
+
+        for col in self.numerical_columns:
+            sketch.quantiles[col].update(df[col].to_numpy(dtype=float))
+
+        for col in self.categorical_columns:
+            for value, count in df[col].value_counts(dropna=False).items():
+                sketch.counts[col][None if pd.isna(value) else value] += int(count)
+
+        # Codes are made dense within the batch, so each pair is counted with a 1-d unique
+        dense = [np.unique(column, return_inverse=True) for column in self._codes(df).T]
+        for i in range(len(self.columns)):
+            uniques_i, inverse_i = dense[i]
+            for j in range(i):
+                uniques_j, inverse_j = dense[j]
+                keys, counts = np.unique(inverse_i * len(uniques_j) + inverse_j, return_counts=True)
+                pair_codes = zip(uniques_i[keys // len(uniques_j)].tolist(), uniques_j[keys % len(uniques_j)].tolist())
+
+                table = sketch.pairs.setdefault((self.columns[i], self.columns[j]), Counter())
+                table.update(dict(zip(pair_codes, counts.tolist())))
+
+    def update_real(self, df):
+        """ Adds a batch of real data """
+        self._update(self.real, df)
+
+    def update_synthetic(self, df):
+        """ Adds a batch of synthetic data """
+        self._update(self.synthetic, df)
+
+    def update_real_from_file(self, path, chunksize=100_000):
+        """ Adds a real data file, streamed in chunks """
+        for chunk in iter_table_chunks(path, chunksize):
+            self.update_real(chunk)
+
+    def update_synthetic_from_file(self, path, chunksize=100_000):
+        """ Adds a synthetic data file, streamed in chunks """
+        for chunk in iter_table_chunks(path, chunksize):
+            self.update_synthetic(chunk)
+
+    def merge(self, other):
+        """ Adds the real and synthetic data summarised by another evaluator,
+        e.g. one that scored another batch in parallel. Both must share columns and bin edges.
+        """
+        if other.columns != self.columns:
+            raise ValueError("Evaluators must be built on the same columns to be merged.")
+
+        if self.bin_edges is None:
+            self.bin_edges = other.bin_edges
+        elif other.bin_edges is not None and any(
+            not np.array_equal(self.bin_edges[col], other.bin_edges[col]) for col in self.numerical_columns
+        ):
+            raise ValueError("Evaluators must share bin edges to be merged, pass bin_edges to both.")
+
+        self.real.merge(other.real)
+        self.synthetic.merge(other.synthetic)
+
+    def get_all_ks_scores(self):
+        """ KS-Scores of the numerical columns, in the format of synthetic_evaluation.get_all_ks_scores """
+        return pd.DataFrame({
+            "numerical_columns": self.numerical_columns,
+            "ks_scores": [
+                ks_complement(self.real.quantiles[col], self.synthetic.quantiles[col])
+                for col in self.numerical_columns
+            ],
+        })
+
+    def get_all_variational_differences(self):
+        """ TVD-Scores of the categorical columns, in the format of
+        synthetic_evaluation.get_all_variational_differences
+        """
+        return pd.DataFrame({
+            "categorical_columns": self.categorical_columns,
+            "tvd_scores": [
+                tv_complement(self.real.counts[col], self.synthetic.counts[col])
+                for col in self.categorical_columns
+            ],
+        })
+
+    def mi_matrices(self):
+        """ Pairwise normalised mutual information matrices of the real and synthetic data
+
+        Returns:
+            matMI (Dataframe): Real data mutual information matrix
+            matMI_syn (Dataframe): Synthetic data mutual information matrix
+        """
+        matMI = pd.DataFrame(1.0, index=self.columns, columns=self.columns)
+        matMI_syn = pd.DataFrame(1.0, index=self.columns, columns=self.columns)
+
+        for (row, col), table in self.real.pairs.items():
+            matMI.loc[row, col] = matMI.loc[col, row] = normalized_mutual_info(table)
+        for (row, col), table in self.synthetic.pairs.items():
+            matMI_syn.loc[row, col] = matMI_syn.loc[col, row] = normalized_mutual_info(table)
+
+        return matMI, matMI_syn
+
+    def mutual_info_scores(self, mi_score_passing_threshold=0.85):
+        """ Overall mutual information scores, as computed by synthetic_evaluation.plot_mi_matrix
+
+        Returns:
+            mutual_info_score: A score for the average mutual information retained (0 to 100)
+            n_pairwise_passed: Proportion of pair-wise relationships that retained threshold amount
+                               of mutual information (0 to 100)
+        """
+        n = len(self.columns)
+        if n < 2:
+            return np.nan, np.nan
+
+        matMI, matMI_syn = self.mi_matrices()
+        lower_triangle_ele = (1 - np.absolute(matMI_syn - matMI)).to_numpy()[np.tril_indices(n, -1)]
+
+        mutual_info_score = 100 * round(np.mean(lower_triangle_ele), 4)
+        n_pairwise_passed = 100 * round(np.mean(lower_triangle_ele > mi_score_passing_threshold), 4)
+        return mutual_info_score, n_pairwise_passed
+
+    def scores(self):
+        """ Summary scores in the format of synthetic_evaluation.get_fidelity_scores """
+        scores = {}
+        if self.numerical_columns:
+            scores["ks_score"] = float(np.nanmean(self.get_all_ks_scores()["ks_scores"]))
+        if self.categorical_columns:
+            scores["tvd_score"] = float(np.nanmean(self.get_all_variational_differences()["tvd_scores"]))
+        if len(self.columns) >= 2:
+            scores["mi_score"] = float(self.mutual_info_scores()[0] / 100)
+
+        scores["fidelity"] = float(np.nanmean(list(scores.values()))) if scores else np.nan
+        return scores
+
+    def save(self, path):
+        """ Saves the evaluator state, so later batches can be added to it """
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        """ Loads an evaluator state saved with .save """
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,191 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import math
+import os
+import numpy as np
+import pandas as pd
+from SynPiper import SynPiper
+from data_io import read_table, write_table, working_extension
+from registry import get_synthesizer
+from synthetic_evaluation import get_fidelity_scores
+
+def expand_search_space(search_space):
+    """ Expands a search space into the list of all configurations (grid).
+
+    Args:
+        search_space (Dictionary): Parameter name to list of candidate values,
+            e.g. {"epochs": [300, 600], "epsilon": [0.5, 1.0]}
+
+    Returns:
+        configs (List): List of parameter dictionaries
+    """
+    names = list(search_space.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*search_space.values())]
+
+def budget_schedule(min_budget, eta):
+    """ Budgets (fractions of the full budget) of each rung of successive halving.
+
+    Args:
+        min_budget (Float): Budget of the first rung, between 0 and 1
+        eta (Integer): Factor by which the budget grows (and survivors shrink) per rung
+
+    Returns:
+        budgets (List): Increasing budgets ending at 1.0
+    """
+    if not 0 < min_budget <= 1 or eta < 2:
+        raise ValueError("min_budget must be in (0, 1] and eta at least 2.")
+
+    budgets = []
+    budget = min_budget
+    while budget < 1:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(1.0)
+    return budgets
+
+def _run_trial(trial):
+    """ Trains, samples and scores a single configuration at a given budget.
+    Runs inside a worker process, so failures are reported rather than raised.
+    """
+    synthesizer_name = trial["synthesizer_name"]
+    trial_dir = trial["trial_dir"]
+    budget = trial["budget"]
+    os.makedirs(trial_dir, exist_ok=True)
+    # sdv stages samples in a temporary file in the working directory and removes it when done,
+    # so concurrent trials sharing a directory would delete each other's file
+    os.chdir(trial_dir)
+
+    # Every worker would otherwise start one torch thread per CPU, oversubscribing the machine
+    try:
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // trial["n_workers"]))
+    except ImportError:
+        pass
+
+    result = {"fidelity": np.nan, "elapsed_time": np.nan, "error": None}
+    try:
+        real_data = read_table(trial["data_path"])
+        train_path = trial["data_path"]
+        ext = working_extension(train_path)
+        param_dict = dict(trial["param_dict"])
+
+        # Synthesizers without a budget parameter are given a subsample of the training data
+        budget_param = get_synthesizer(synthesizer_name).budget_param
+        if budget_param is not None:
+            param_dict[budget_param] = max(1, int(round(param_dict[budget_param] * budget)))
+        elif budget < 1:
+            train_path = os.path.join(trial_dir, f"train_subsample{ext}")
+            write_table(real_data.sample(frac=budget, random_state=trial["seed"]), train_path)
+
+        piper = SynPiper(
+            data_path=train_path,
+            synthesizer_name=synthesizer_name,
+            param_dict=param_dict,
+            synthetic_filepath=os.path.join(trial_dir, f"synthetic{ext}"),
+            seed=trial["seed"],
+        )
+
+        # Trials run concurrently, so each writes its own description file and learns its
+        # Bayesian network in its own process (rather than a pool per trial, n_workers squared in total)
+        if hasattr(piper.processor, "description_file"):
+            piper.processor.description_file = os.path.join(trial_dir, "description.json")
+            piper.processor.n_workers = 1
+
+        piper.generate(num_tuples_to_generate=trial["num_tuples_to_generate"] or len(real_data))
+
+        result.update(get_fidelity_scores(
+            real_data,
+            piper.generated_samples,
+            trial["categorical_columns"],
+            trial["numerical_columns"],
+            include_mi=trial["include_mi"],
+        ))
+        result["elapsed_time"] = piper.elapsed_time
+
+    except Exception as e:
+        result["error"] = repr(e)
+
+    return result
+
+def successive_halving(data_path, synthesizer_name, param_dict, search_space,
+                       numerical_columns, workdir, num_tuples_to_generate=None,
+                       min_budget=1/9, eta=3, n_workers=None, include_mi=False, seed=0):
+    """ Hyperparameter sweep over a synthesizer's settings using successive halving.
+    All configurations are first trained at a low budget (fewer epochs for CTGAN / TVAE,
+    a subsample of the data for DP Synthesizer). Only the best 1/eta of each rung, ranked
+    by fidelity score, are promoted to the next rung with eta times the budget, until
+    the survivors are trained at the full budget. Trials of a rung run in a process pool.
+
+    Args:
+        data_path: File Path of where the Real Data is found
+        synthesizer_name: Name of Synthesizer
+        param_dict: Parameters shared by all configurations (e.g. categorical_attributes)
+        search_space: Parameter name to list of candidate values
+        numerical_columns: List of numerical column names used for evaluation
+        workdir: Directory where every trial's files will be stored
+        num_tuples_to_generate: Number of samples per trial (defaults to the size of the real data)
+        min_budget: Budget of the first rung, as a fraction of the full budget
+        eta: Factor by which the budget grows and the survivors shrink per rung
+        n_workers: Number of worker processes (defaults to the number of CPUs)
+        include_mi: Whether to include the mutual information score in the fidelity
+        seed: Seed used to subsample the data, train and sample
+
+    Returns:
+        df_results (Dataframe): One row per trial with its configuration, rung, budget,
+            fidelity scores and elapsed time. Ranked with the full-budget trials first,
+            best fidelity first within each rung.
+    """
+    # Raises ValueError for an unspecified Synthesizer Name
+    get_synthesizer(synthesizer_name)
+
+    configs = expand_search_space(search_space)
+    budgets = budget_schedule(min_budget, eta)
+    categorical_columns = param_dict.get("categorical_attributes", [])
+    survivors = list(range(len(configs)))
+    results = []
+    # Trials change into their own directory, so all paths are made absolute
+    data_path = os.path.abspath(data_path)
+    workdir = os.path.abspath(workdir)
+    n_workers = n_workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for rung, budget in enumerate(budgets):
+            # A single survivor goes straight to the full budget
+            if len(survivors) == 1 and budget < 1:
+                continue
+
+            trials = [
+                {
+                    "synthesizer_name": synthesizer_name,
+                    "data_path": data_path,
+                    "param_dict": {**param_dict, **configs[i]},
+                    "budget": budget,
+                    "num_tuples_to_generate": num_tuples_to_generate,
+                    "trial_dir": os.path.join(workdir, f"rung_{rung}", f"config_{i}"),
+                    "categorical_columns": categorical_columns,
+                    "numerical_columns": numerical_columns,
+                    "include_mi": include_mi,
+                    "seed": seed,
+                    "n_workers": n_workers,
+                }
+                for i in survivors
+            ]
+
+            rung_results = []
+            for i, result in zip(survivors, pool.map(_run_trial, trials)):
+                result.update(configs[i], config_id=i, rung=rung, budget=budget)
+                rung_results.append(result)
+                if result["error"] is not None:
+                    print(f"Config {i} failed at budget {budget:.3f}: {result['error']}")
+
+            results.extend(rung_results)
+
+            # Failed trials (NaN fidelity) are ranked last
+            rung_results.sort(key=lambda r: -np.nan_to_num(r["fidelity"], nan=-np.inf))
+            n_keep = max(1, math.floor(len(survivors) / eta))
+            survivors = [r["config_id"] for r in rung_results[:n_keep]]
+            print(f"Rung {rung} (budget {budget:.3f}) complete, promoting configs {survivors}")
+
+    df_results = pd.DataFrame(results)
+    df_results = df_results.sort_values(["rung", "fidelity"], ascending=[False, False], na_position="last")
+    return df_results.reset_index(drop=True)
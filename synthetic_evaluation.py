@@ -9,12 +9,8 @@ import plotly.figure_factory as ff
 from pandas.api.types import is_numeric_dtype
 import warnings
 
-# SDV Metrics Libraries
-from sdv.evaluation.single_table import get_column_plot
-from sdv.metadata import SingleTableMetadata
-from sdmetrics.single_column import KSComplement
-from sdmetrics.single_column import TVComplement
-from sdmetrics.single_table import LogisticDetection
+# SDV and SDV Metrics libraries are imported inside the functions that use them,
+# as importing sdv also loads torch.
 
 def sdv_metadata_auto_processing(real_data, categorical_threshold=10):
     """ Metadata Processing for sdv_metrics library
@@ -27,6 +23,8 @@ def sdv_metadata_auto_processing(real_data, categorical_threshold=10):
     Returns:
         metadata: Synthetic Data Vault metadata for plotting
     """
+    from sdv.metadata import SingleTableMetadata
+
     metadata = SingleTableMetadata()
 
     for col in real_data.columns:
@@ -47,6 +45,7 @@ def sdv_metadata_manual_processing(real_data, categorical_attributes):
     Returns:
         metadata: Synthetic Data Vault metadata for plotting
     """
+    from sdv.metadata import SingleTableMetadata
     
     metadata = SingleTableMetadata()
 
@@ -70,6 +69,7 @@ def plot_real_synthetic(real_data, synthetic, colname):
     Returns:
         fig (plotly figure): Plotly Figure of Real and Synthetic Distribution
     """
+    from sdv.evaluation.single_table import get_column_plot
 
     # Synthetic Data Vault Processing for get_column_plot function
     metadata = sdv_metadata_auto_processing(real_data)
@@ -97,6 +97,8 @@ def get_all_ks_scores(real_table, synthetic_table, numerical_columns):
         df_ks (Dataframe): Pandas DataFrame of the KS-Scores for each numerical column
         fig (plotly figure): A plotly barplot of KS-Scores
     """
+    from sdmetrics.single_column import KSComplement
+
     results = []
     series_results = {}
 
@@ -140,6 +142,8 @@ def get_all_variational_differences(real_table, synthetic_table, categorical_col
         fig (plotly figure): A plotly barplot of TVD-Scores
 
     """
+    from sdmetrics.single_column import TVComplement
+
     results = []
     series_results = {}
 
@@ -266,3 +270,41 @@ def plot_mi_matrix(df, df_syn):
     return fig, mutual_info_score, n_pairwise_passed
 
 
+
+
+def get_fidelity_scores(real_table, synthetic_table, categorical_columns, numerical_columns, include_mi=False):
+    """ Summarises the column-wise similarity of Real and Synthetic data as single scores.
+    Used to compare synthesizer configurations against each other.
+
+    Args:
+        real_table (Dataframe): Pandas DataFrame of Real Data
+        synthetic_table (Dataframe): Pandas DataFrame of Synthetic Data
+        categorical_columns (List): A list of categorical columns names.
+        numerical_columns (List): A list of numerical column names.
+        include_mi (Boolean): Whether to include the pairwise mutual information score,
+            which is quadratic in the number of columns.
+
+    Returns:
+        scores (Dictionary):
+            ks_score : Average KS-Score over the numerical columns (0 to 1)
+            tvd_score : Average TVD-Score over the categorical columns (0 to 1)
+            mi_score : Mutual information score (0 to 1), only if include_mi
+            fidelity : Average of the scores above
+    """
+    scores = {}
+
+    if numerical_columns:
+        df_ks, _ = get_all_ks_scores(real_table, synthetic_table, numerical_columns)
+        scores["ks_score"] = float(np.mean(df_ks["ks_scores"]))
+
+    if categorical_columns:
+        df_tvd, _ = get_all_variational_differences(real_table, synthetic_table, categorical_columns)
+        scores["tvd_score"] = float(np.mean(df_tvd["tvd_scores"]))
+
+    if include_mi:
+        fig, mutual_info_score, _ = plot_mi_matrix(real_table, synthetic_table)
+        plt.close(fig)
+        scores["mi_score"] = mutual_info_score / 100
+
+    scores["fidelity"] = float(np.nanmean(list(scores.values()))) if scores else np.nan
+    return scores
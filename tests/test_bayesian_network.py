@@ -0,0 +1,38 @@
+""" Parallel Bayesian network search against DataSynthesizer's greedy_bayes """
+import os
+import pandas as pd
+import pytest
+
+pytest.importorskip("DataSynthesizer")
+
+from bayesian_network import greedy_bayes_parallel
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "employee_attrition.csv")
+
+@pytest.fixture(scope="module")
+def encoded():
+    # Trimmed, as greedy_bayes takes seconds per network on the full dataset.
+    # Columns are encoded into integer bin indices, as DataDescriber does before the search.
+    df = pd.read_csv(DATASET).iloc[:500, :7]
+    return pd.DataFrame({
+        col: pd.factorize(pd.cut(df[col], 20) if df[col].nunique() > 20 else df[col], sort=True)[0]
+        for col in df.columns
+    })
+
+@pytest.fixture(scope="module")
+def reference(encoded):
+    """ greedy_bayes network of each (k, epsilon, seed), computed once for all n_workers """
+    from DataSynthesizer.lib.PrivBayes import greedy_bayes
+
+    networks = {}
+    def network(k, epsilon, seed):
+        if (k, epsilon, seed) not in networks:
+            networks[k, epsilon, seed] = greedy_bayes(encoded, k, epsilon, seed=seed)
+        return networks[k, epsilon, seed]
+    return network
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+@pytest.mark.parametrize("k, epsilon, seed", [(2, 0, 0), (2, 0.5, 1), (3, 1.0, 2)])
+def test_same_network_as_greedy_bayes(encoded, reference, k, epsilon, seed, n_workers):
+    expected = reference(k, epsilon, seed)
+    assert greedy_bayes_parallel(encoded, k, epsilon, seed=seed, n_workers=n_workers) == expected
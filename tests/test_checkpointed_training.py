@@ -0,0 +1,106 @@
+""" Checkpointed CTGAN / TVAE training through SynPiper, with the real sdv and ctgan """
+import os
+import pandas as pd
+import pytest
+
+pytest.importorskip("sdv")
+
+import checkpointed_training
+from SynPiper import SynPiper
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "heartprocessed.csv")
+
+TRAINERS = {
+    "ctgan": checkpointed_training.CTGANTrainer,
+    "tvae": checkpointed_training.TVAETrainer,
+}
+
+class Interrupted(Exception):
+    pass
+
+@pytest.fixture(params=list(TRAINERS))
+def synthesizer_name(request):
+    return request.param
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "train.csv"
+    pd.read_csv(DATASET).head(500).to_csv(path, index=False)
+    return str(path)
+
+def make_piper(synthesizer_name, data_path, tmp_path, checkpoint_dir=None, epochs=6):
+    real_data = pd.read_csv(data_path)
+    categorical_columns = [col for col in real_data.columns if real_data[col].nunique() <= 10]
+    return SynPiper(data_path, synthesizer_name,
+                    {"categorical_attributes": categorical_columns, "epochs": epochs},
+                    synthetic_filepath=os.path.join(tmp_path, "synthetic.csv"),
+                    seed=0, checkpoint_dir=checkpoint_dir, checkpoint_every=2)
+
+def test_fit_save_load_sample(synthesizer_name, data_path, tmp_path):
+    from sdv.single_table.base import BaseSynthesizer
+
+    piper = make_piper(synthesizer_name, data_path, tmp_path, checkpoint_dir=tmp_path / "checkpoints")
+    piper.fit()
+
+    synthesizer = piper.model
+    assert synthesizer._fitted
+    assert synthesizer._fitted_date is not None
+    assert synthesizer._fitted_sdv_version is not None
+
+    model_path = str(tmp_path / "model.pkl")
+    piper.spec.save_model(synthesizer, model_path)
+    loaded = BaseSynthesizer.load(model_path)
+
+    expected = piper.sample(50, seed=1)
+    piper.model = loaded
+    synthetic_data = piper.sample(50, seed=1)
+    assert list(synthetic_data.columns) == list(pd.read_csv(data_path).columns)
+    pd.testing.assert_frame_equal(synthetic_data, expected)
+
+    # The checkpoint and the training data are removed once training completes
+    assert os.listdir(tmp_path / "checkpoints") == []
+
+def test_resume_matches_uninterrupted_training(synthesizer_name, data_path, tmp_path, monkeypatch):
+    uninterrupted = make_piper(synthesizer_name, data_path, tmp_path)
+    uninterrupted.fit()
+    expected = uninterrupted.sample(50, seed=1)
+
+    checkpoint_dir = tmp_path / "checkpoints"
+    trainer_class = TRAINERS[synthesizer_name]
+    train_epoch = trainer_class.train_epoch
+    saves = []
+
+    def interrupted_epoch(self, epoch):
+        if epoch == 5:
+            raise Interrupted()
+        train_epoch(self, epoch)
+
+    def save_training_data(*args):
+        saves.append(args)
+        original_save_training_data(*args)
+
+    original_save_training_data = checkpointed_training.save_training_data
+    with monkeypatch.context() as patch:
+        patch.setattr(trainer_class, "train_epoch", interrupted_epoch)
+        patch.setattr(checkpointed_training, "save_training_data", save_training_data)
+        piper = make_piper(synthesizer_name, data_path, tmp_path, checkpoint_dir=checkpoint_dir)
+        with pytest.raises(Interrupted):
+            piper.fit()
+
+    # Checkpoints after epochs 2 and 4, the training data is written once
+    assert len(saves) == 1
+    assert os.path.exists(piper.checkpoint_path)
+    assert os.path.exists(checkpointed_training.training_data_path(piper.checkpoint_path))
+
+    # A new run with the same data, parameters and seed continues from the checkpoint
+    resumed = make_piper(synthesizer_name, data_path, tmp_path, checkpoint_dir=checkpoint_dir)
+    resumed.fit()
+    assert resumed.model._fitted
+    assert not os.path.exists(resumed.checkpoint_path)
+
+    pd.testing.assert_frame_equal(resumed.sample(50, seed=1), expected)
+
+def test_resume_without_checkpoint(data_path, tmp_path):
+    piper = make_piper("ctgan", data_path, tmp_path, checkpoint_dir=tmp_path / "checkpoints")
+    with pytest.raises(ValueError):
+        piper.resume()
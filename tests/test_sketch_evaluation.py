@@ -0,0 +1,98 @@
+""" Sketch-based scores against the exact scores computed on the full tables """
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from sketch_evaluation import SketchEvaluator
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "adult_processed.csv")
+NUMERICAL_COLUMNS = ["age", "educational-num", "hours-per-week"]
+
+@pytest.fixture(scope="module")
+def real():
+    return pd.read_csv(DATASET)
+
+@pytest.fixture(scope="module")
+def synthetic(real):
+    # Shuffling each column separately keeps the marginals close but breaks the relationships,
+    # and the numerical columns are shifted so the KS statistic is not trivial
+    rng = np.random.default_rng(0)
+    synthetic = real.sample(n=30_000, replace=True, random_state=1).reset_index(drop=True)
+    for col in synthetic.columns:
+        synthetic[col] = rng.permutation(synthetic[col].to_numpy())
+    for col in NUMERICAL_COLUMNS:
+        synthetic[col] += rng.integers(-2, 3, size=len(synthetic))
+    return synthetic
+
+@pytest.fixture(scope="module")
+def categorical_columns(real):
+    return [col for col in real.columns if col not in NUMERICAL_COLUMNS]
+
+@pytest.fixture(scope="module")
+def evaluator(real, synthetic, categorical_columns):
+    evaluator = SketchEvaluator(categorical_columns, NUMERICAL_COLUMNS)
+    evaluator.update_real(real)
+    evaluator.update_synthetic(synthetic)
+    return evaluator
+
+def test_ks_scores_close_to_scipy(evaluator, real, synthetic):
+    from scipy.stats import ks_2samp
+
+    df_ks = evaluator.get_all_ks_scores().set_index("numerical_columns")
+    for col in NUMERICAL_COLUMNS:
+        exact = 1 - ks_2samp(real[col], synthetic[col]).statistic
+        assert df_ks.loc[col, "ks_scores"] == pytest.approx(exact, abs=0.005)
+
+def test_tvd_scores_match_pandas(evaluator, real, synthetic, categorical_columns):
+    df_tvd = evaluator.get_all_variational_differences().set_index("categorical_columns")
+    for col in categorical_columns:
+        real_freq = real[col].value_counts(normalize=True)
+        synthetic_freq = synthetic[col].value_counts(normalize=True)
+        exact = 1 - 0.5 * real_freq.subtract(synthetic_freq, fill_value=0).abs().sum()
+        assert df_tvd.loc[col, "tvd_scores"] == pytest.approx(exact, abs=1e-12)
+
+def test_categorical_mutual_info_matches_sklearn(evaluator, real, synthetic, categorical_columns):
+    from sklearn.metrics import normalized_mutual_info_score
+
+    matMI, matMI_syn = evaluator.mi_matrices()
+    for i, row in enumerate(categorical_columns):
+        for col in categorical_columns[:i]:
+            exact = normalized_mutual_info_score(real[row], real[col], average_method="arithmetic")
+            exact_syn = normalized_mutual_info_score(synthetic[row], synthetic[col], average_method="arithmetic")
+            assert matMI.loc[row, col] == pytest.approx(exact, abs=1e-9)
+            assert matMI_syn.loc[row, col] == pytest.approx(exact_syn, abs=1e-9)
+
+def test_merged_evaluators_match_single_pass(evaluator, real, synthetic, categorical_columns):
+    bin_edges = evaluator.bin_edges
+    halves = [
+        SketchEvaluator(categorical_columns, NUMERICAL_COLUMNS, bin_edges=bin_edges, seed=seed)
+        for seed in (1, 2)
+    ]
+    halves[0].update_real(real.iloc[:20_000])
+    halves[0].update_synthetic(synthetic.iloc[:10_000])
+    halves[1].update_real(real.iloc[20_000:])
+    halves[1].update_synthetic(synthetic.iloc[10_000:])
+    merged = halves[0]
+    merged.merge(halves[1])
+
+    assert merged.real.n_rows == evaluator.real.n_rows
+    assert merged.synthetic.n_rows == evaluator.synthetic.n_rows
+    pd.testing.assert_frame_equal(
+        merged.get_all_variational_differences(), evaluator.get_all_variational_differences()
+    )
+    for merged_matrix, single_matrix in zip(merged.mi_matrices(), evaluator.mi_matrices()):
+        pd.testing.assert_frame_equal(merged_matrix, single_matrix, rtol=1e-12)
+
+    # KLL compaction is randomised, so the merged quantiles only agree up to the sketch error
+    np.testing.assert_allclose(
+        merged.get_all_ks_scores()["ks_scores"], evaluator.get_all_ks_scores()["ks_scores"], atol=0.005
+    )
+
+def test_merge_rejects_different_bin_edges(real, categorical_columns):
+    first = SketchEvaluator(categorical_columns, NUMERICAL_COLUMNS)
+    second = SketchEvaluator(categorical_columns, NUMERICAL_COLUMNS)
+    first.update_real(real.iloc[:1000])
+    second.update_real(real.iloc[-1000:].assign(age=lambda df: df["age"] * 2))
+    with pytest.raises(ValueError):
+        first.merge(second)
@@ -0,0 +1,72 @@
+""" Stratified train / holdout split, in memory and streamed to files """
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import split_to_files, train_val_split
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets", "BankChurners.csv")
+LABEL = "Attrition_Flag"
+
+@pytest.fixture(scope="module")
+def bank():
+    return pd.read_csv(DATASET, dtype={LABEL: str})
+
+@pytest.mark.parametrize("ratio", [0.3, 0.5, 0.8])
+def test_every_stratum_within_one_row_of_its_share(bank, ratio):
+    df = bank.assign(stratum=bank[LABEL] + "/" + bank["Card_Category"])
+    df_train, df_val = train_val_split(df, "stratum", ratio, seed=3)
+
+    assert len(df_train) + len(df_val) == len(df)
+    train_counts = df_train["stratum"].value_counts()
+    for stratum, total in df["stratum"].value_counts().items():
+        assert abs(train_counts.get(stratum, 0) - total * ratio) < 1
+
+def test_singleton_labels_go_to_train():
+    df = pd.DataFrame({"label": ["a"] * 10 + ["b", "c", "d"], "x": range(13)})
+    for seed in range(20):
+        df_train, _ = train_val_split(df, "label", 0.2, seed=seed)
+        assert {"b", "c", "d"} <= set(df_train["label"])
+
+def test_missing_labels_form_their_own_stratum():
+    labels = ["a", "b"] * 20 + [None] * 10 + [np.nan] * 10
+    df = pd.DataFrame({"label": labels, "x": range(len(labels))})
+    df_train, df_val = train_val_split(df, "label", 0.7, seed=0)
+
+    assert len(df_train) + len(df_val) == len(df)
+    assert abs(df_train["label"].isna().sum() - 20 * 0.7) < 1
+
+def test_chunked_split_matches_in_memory(bank, tmp_path):
+    df_train, df_val = train_val_split(bank, LABEL, 0.7, seed=5)
+    train_path, val_path = tmp_path / "train.csv", tmp_path / "val.csv"
+    split_to_files(DATASET, LABEL, 0.7, train_path, val_path, seed=5, chunksize=777)
+
+    pd.testing.assert_frame_equal(pd.read_csv(train_path, dtype={LABEL: str}), df_train.reset_index(drop=True))
+    pd.testing.assert_frame_equal(pd.read_csv(val_path, dtype={LABEL: str}), df_val.reset_index(drop=True))
+
+def test_chunked_split_with_missing_labels_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    labels = rng.choice(["a", "b", "c", None], size=1000, p=[0.5, 0.3, 0.1, 0.1])
+    df = pd.DataFrame({"label": labels, "x": np.arange(1000)})
+    source = tmp_path / "source.csv"
+    df.to_csv(source, index=False)
+    df = pd.read_csv(source, dtype={"label": str})
+
+    df_train, df_val = train_val_split(df, "label", 0.6, seed=1)
+    train_path, val_path = tmp_path / "train.csv", tmp_path / "val.csv"
+    split_to_files(source, "label", 0.6, train_path, val_path, seed=1, chunksize=77)
+
+    streamed = pd.read_csv(train_path, dtype={"label": str})
+    pd.testing.assert_frame_equal(streamed, df_train.reset_index(drop=True))
+    pd.testing.assert_frame_equal(pd.read_csv(val_path, dtype={"label": str}), df_val.reset_index(drop=True))
+    assert abs(streamed["label"].isna().sum() - df["label"].isna().sum() * 0.6) < 1
+
+def test_rerun_with_same_inputs_is_skipped(tmp_path):
+    train_path, val_path = tmp_path / "train.csv", tmp_path / "val.csv"
+    assert split_to_files(DATASET, LABEL, 0.7, train_path, val_path, seed=0)
+    assert not split_to_files(DATASET, LABEL, 0.7, train_path, val_path, seed=0)
+    assert split_to_files(DATASET, LABEL, 0.7, train_path, val_path, seed=1)
+
+    os.remove(val_path)
+    assert split_to_files(DATASET, LABEL, 0.7, train_path, val_path, seed=1)
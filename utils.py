@@ -1,36 +1,189 @@
-from sklearn.model_selection import train_test_split
-import pandas as pd
+import hashlib
+import json
+import os
+import random
+import numpy as np
+from data_io import ChunkedTableWriter, iter_table_chunks, table_format, temporary_path
 
-def train_val_split(df, label_col, ratio):
+# Stratum key of rows with a missing label, which cannot clash with a label read as text
+_MISSING_LABEL_KEY = "\x00missing"
+
+def _stratum_keys(labels):
+    """ Stratum key of every row: the label as a string, missing labels forming their own stratum """
+    return labels.astype(object).where(labels.notna(), _MISSING_LABEL_KEY).astype(str)
+
+def _stratum_offsets(keys, ratio, seed, offsets):
+    """ Assigns each unseen stratum a deterministic start offset in [1 - ratio, 1).
+        Starting in this range guarantees the first member of every stratum
+        goes to the training split, so rare classes are always represented.
+    """
+    for key in keys:
+        if key not in offsets:
+            digest = hashlib.blake2b(f"{seed}:{key}".encode("utf-8"), digest_size=8).digest()
+            h = int.from_bytes(digest, "big") / 2**64
+            offsets[key] = (1 - ratio) + ratio * h
+    return offsets
+
+def _stratified_train_mask(keys, ratio, seed, seen, offsets):
+    """ Hash-seeded systematic sampling within each stratum.
+        The k-th member of a stratum goes to the training split when
+        floor((k + 1) * ratio + offset) > floor(k * ratio + offset), which keeps
+        every stratum within one row of its exact share. `seen` and `offsets` carry
+        state between chunks and are updated in place.
+
+    Args:
+        keys (Series): Stratum key for every row (see _stratum_keys)
+        ratio (Float): Ratio from 0 to 1 on the train-val split
+        seed (Integer): Seed for the stratum offsets
+        seen (Dictionary): Number of rows already assigned per stratum
+        offsets (Dictionary): Start offset per stratum
+
+    Returns:
+        mask (ndarray): Boolean array, True where the row belongs to the training split
+    """
+    uniques = keys.unique()
+    _stratum_offsets(uniques, ratio, seed, offsets)
+    for key in uniques:
+        seen.setdefault(key, 0)
+
+    k = keys.groupby(keys, sort=False).cumcount().to_numpy() + keys.map(seen).to_numpy()
+    offset = keys.map(offsets).to_numpy()
+    mask = np.floor((k + 1) * ratio + offset) > np.floor(k * ratio + offset)
+
+    for key, count in keys.value_counts(sort=False).items():
+        seen[key] += int(count)
+    return mask
+
+def _check_ratio(ratio):
+    if not 0 < ratio < 1:
+        raise ValueError("Ratio must be strictly between 0 and 1.")
+
+def train_val_split(df, label_col, ratio, seed=0):
     """ Splits the dataframe (df) into a train and validation set based on the specified ratio
         The validation set acts as a holdout for evaluation of synthetic data.
-        
+        Every label keeps its share of rows in both splits, and labels with a single
+        member are placed in the training split.
+
     Args:
         df (Dataframe): Real dataframe
         label_col (String): Column name of label / target
         ratio (Float) : Ratio from 0 to 1 on the train-val split
-    
+        seed (Integer) : Seed for the deterministic split
+
     Returns:
         df_train (Dataframe) : Training data split for synthetic generation
         df_val (Dataframe) : Hold out validation split for evaluating synthetic data
     """
-    X = df.drop(label_col, axis = 1)
-    y = df[label_col]
+    _check_ratio(ratio)
+    keys = _stratum_keys(df[label_col])
+    mask = _stratified_train_mask(keys, ratio, seed, seen={}, offsets={})
 
-    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size= 1 - ratio,
-                                                      stratify = y)
-
-    df_train = pd.concat([X_train, y_train], axis = 1)
-    df_val = pd.concat([X_val, y_val], axis = 1)
+    df_train = df[mask]
+    df_val = df[~mask]
     return df_train, df_val
 
+def source_fingerprint(source):
+    """ Identifies the contents of a data source so repeated work can be skipped.
+        Paths are identified by size and modification time, file-like objects
+        (e.g. Streamlit uploads) by a hash of their contents.
+
+    Args:
+        source (Path or file-like object): Data source
+
+    Returns:
+        fingerprint (String): Identifier that changes when the source changes
+    """
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        return f"{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    digest = hashlib.sha1()
+    position = source.tell()
+    while True:
+        block = source.read(1 << 20)
+        if not block:
+            break
+        digest.update(block if isinstance(block, bytes) else block.encode("utf-8"))
+    source.seek(position)
+    return digest.hexdigest()
+
+def split_to_files(source, label_col, ratio, train_path, val_path, seed=0, chunksize=100_000):
+    """ Streams the real data (source) into a train and holdout file in a single pass.
+        Rows are assigned per label with the same deterministic sampling as `train_val_split`,
+        so only one chunk is held in memory at a time. The outputs are written in the format
+        of their file extension (csv, Parquet or Feather). A manifest is written next to the
+        training file, and the split is skipped when the source, label, ratio and seed
+        are unchanged and both outputs still exist.
+
+    Args:
+        source (Path or file-like object): Real data (csv, compressed csv, Parquet or Feather)
+        label_col (String): Column name of label / target
+        ratio (Float): Ratio from 0 to 1 on the train-val split
+        train_path (Path): File Path where the training split will be stored
+        val_path (Path): File Path where the holdout split will be stored
+        seed (Integer): Seed for the deterministic split
+        chunksize (Integer): Number of rows read per chunk
+
+    Returns:
+        written (Boolean): False if the existing split was reused, True otherwise
+    """
+    _check_ratio(ratio)
+    manifest_path = f"{train_path}.split.json"
+    manifest = {
+        "source": source_fingerprint(source),
+        "label_col": label_col,
+        "ratio": ratio,
+        "seed": seed,
+    }
+
+    if os.path.exists(train_path) and os.path.exists(val_path) and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) == manifest:
+                return False
+
+    train_tmp = temporary_path(train_path)
+    val_tmp = temporary_path(val_path)
+    seen, offsets = {}, {}
+    empty = True
+
+    # Labels of csv files are read as text so stratum keys are stable across chunks
+    # and the label column is written back exactly as it was read.
+    dtype = {label_col: str} if table_format(source) == "csv" else None
+
+    with ChunkedTableWriter(train_tmp, table_format(train_path)) as train_writer, \
+         ChunkedTableWriter(val_tmp, table_format(val_path)) as val_writer:
+        for chunk in iter_table_chunks(source, chunksize, dtype=dtype):
+            mask = _stratified_train_mask(_stratum_keys(chunk[label_col]), ratio, seed, seen, offsets)
+            train_writer.write(chunk[mask])
+            val_writer.write(chunk[~mask])
+            empty = False
+
+    if empty:
+        raise ValueError("No rows found in the uploaded data.")
+
+    os.replace(train_tmp, train_path)
+    os.replace(val_tmp, val_path)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    return True
+
+def pin_seeds(seed):
+    """ Seeds every random number generator used by the synthesizers """
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except ImportError:
+        pass
+
 def count_exact_match_rows(df_real, df_syn):
     """ Count the number of exact match rows between `df1` and `df2`.
-    
+
     Args:
         df_real (DataFrame): Real Dataframe.
         df_syn (DataFrame): Synthetic dataframe.
-    
+
     Returns:
         Exact Math score: The score of exact match rows from the Synthetic df in Real df.
             100% = 0 Exact Matches
@@ -39,4 +192,4 @@ def count_exact_match_rows(df_real, df_syn):
 
     percent_match = sum(df_syn.equals(row) for _, row in df_real.iterrows()) / df_syn.shape[0]
     score_match = (1 - percent_match) * 100
-    return score_match
\ No newline at end of file
+    return score_match